@@ -8,7 +8,10 @@ import pyromod
 from pyrogram import Client, errors, raw, types
 
 from bot.config import Config
-from bot.utils import add_admin, set_commands
+from bot.utils import add_admin, checkpoint_running_tasks, set_commands
+from bot.utils.notion_client import notion_client
+from bot.utils.notion_indexer import notion_indexer
+from bot.utils.scheduler import note_flood_wait
 from bot.utils.webserver import start_webserver
 from database import db
 
@@ -31,6 +34,7 @@ class User(Client):
     def __init__(self, session_string: str, **kwargs):
         name = kwargs.get("name", "user")
         kwargs.pop("name", None)
+        self.bot_user_id = kwargs.pop("user_id", None)
         super().__init__(
             name,
             api_id=Config.API_ID,
@@ -64,6 +68,8 @@ class User(Client):
         me = await self.get_me()
         self.username = f"@{me.username}"
         Config.CLIENTS[me.id] = self
+        if self.bot_user_id:
+            Config.USER_CLIENTS[self.bot_user_id] = self
         logging.info(f"User {self.username} started")
         logging.info(f"Owner: {Config.OWNER_ID}")
         
@@ -72,6 +78,8 @@ class User(Client):
 
     async def stop(self, *args):
         await super().stop()
+        if self.bot_user_id and Config.USER_CLIENTS.get(self.bot_user_id) is self:
+            Config.USER_CLIENTS.pop(self.bot_user_id)
         logging.info(f"User {self.me.id} stopped")
 
 
@@ -96,6 +104,7 @@ class Bot(Client):
         # self.owner = await self.get_users(int(Config.OWNER_ID))
         # logging.info(f"Owner: {self.owner.full_name}")
 
+        await db.ensure_indexes()
         await add_admin(Config.OWNER_ID)
         await set_commands(self)
 
@@ -110,17 +119,27 @@ class Bot(Client):
             if client.get("session") is None or client["session"].get("string") is None:
                 continue
 
-            c = User(client["session"]["string"], name=f"user_{client['_id']}")
+            c = User(
+                client["session"]["string"],
+                name=f"user_{client['_id']}",
+                user_id=client["_id"],
+            )
             clients_to_start.append(c)
 
         await asyncio.gather(*[c.start() for c in clients_to_start])
         logging.info(f"Started {len(clients_to_start)} users")
         
+        if Config.NOTION_TOKEN:
+            await notion_indexer.start()
+
         if Config.WEB_SERVER:
             await start_webserver()
 
     async def stop(self, *args):
+        await self.suppress(checkpoint_running_tasks)
         await asyncio.gather(*[self.suppress(c.stop) for c in Config.CLIENTS.values()])
+        await self.suppress(notion_indexer.stop)
+        await self.suppress(notion_client.close)
         await super().stop()
 
     async def get_users(
@@ -218,6 +237,9 @@ class Bot(Client):
             return await func(*args, **kwargs)
         except errors.FloodWait as e:
             logging.warning(f"Floodwait for {e.value} seconds")
+            note_flood_wait(
+                getattr(func, "__self__", self), e.value, getattr(func, "__name__", None)
+            )
             await asyncio.sleep(e.value)
             return await self.floodwait_handler(func, *args, **kwargs)
 
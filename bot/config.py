@@ -27,6 +27,14 @@ class Config(object):
     DATABASE_URL = os.environ.get("DATABASE_URL", None)
     OWNER_ID = os.environ.get("OWNER_ID")
 
+    # Database connection pool
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_SERVER_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_TIMEOUT_MS", 30000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 20000))
+    MONGO_READ_CONCERN = os.environ.get("MONGO_READ_CONCERN")
+    MONGO_WRITE_CONCERN = os.environ.get("MONGO_WRITE_CONCERN")
+
     # LOG CHANNELS
     USER_INFO_LOG = int(os.environ.get("USER_INFO_LOG", 0))
     FILES_LOG = int(os.environ.get("FILES_LOG", 0))
@@ -34,13 +42,53 @@ class Config(object):
     # Notion
     NOTION_TOKEN = os.environ.get("NOTION_TOKEN")
     NOTION_PARENT_PAGE_ID = os.environ.get("NOTION_PARENT_PAGE_ID")
+    NOTION_POOL_SIZE = int(os.environ.get("NOTION_POOL_SIZE", 10))
+    NOTION_TIMEOUT = int(os.environ.get("NOTION_TIMEOUT", 60))
+    NOTION_RATE_LIMIT = float(os.environ.get("NOTION_RATE_LIMIT", 3))
+    NOTION_MAX_RETRIES = int(os.environ.get("NOTION_MAX_RETRIES", 5))
+    NOTION_UPLOAD_CONCURRENCY = int(os.environ.get("NOTION_UPLOAD_CONCURRENCY", 4))
+    NOTION_INDEX_WORKERS = int(os.environ.get("NOTION_INDEX_WORKERS", 3))
+    NOTION_INDEX_QUEUE_SIZE = int(os.environ.get("NOTION_INDEX_QUEUE_SIZE", 1000))
+    ARCHIVE_MAX_FILES = int(os.environ.get("ARCHIVE_MAX_FILES", 100))
+    ARCHIVE_MAX_SIZE = int(os.environ.get("ARCHIVE_MAX_SIZE", 500 * 1024 * 1024))
 
     # Optional
     WEB_SERVER = is_enabled(os.environ.get("WEB_SERVER", "False"), False)
-    SLEEP_TIME = int(os.environ.get("SLEEP_TIME", 60))
+    # Adaptive pacing per account: seconds between transfers at start and at the bounds,
+    # and how much the rate (transfers/s) grows after each success
+    PACING_START_INTERVAL = float(
+        os.environ.get("PACING_START_INTERVAL", os.environ.get("SLEEP_TIME", 60))
+    )
+    PACING_MIN_INTERVAL = float(os.environ.get("PACING_MIN_INTERVAL", 1))
+    PACING_MAX_INTERVAL = float(os.environ.get("PACING_MAX_INTERVAL", 120))
+    PACING_INCREASE = float(os.environ.get("PACING_INCREASE", 0.01))
+    TRANSFER_CONCURRENCY = int(os.environ.get("TRANSFER_CONCURRENCY", 3))
+    # Telegram IDs of operator-owned accounts (logged in via /account) that batch
+    # tasks of every user may borrow, comma separated; other users' accounts are never used
+    BATCH_WORKER_ACCOUNTS = [
+        int(account_id)
+        for account_id in os.environ.get("BATCH_WORKER_ACCOUNTS", "").split(",")
+        if account_id.strip()
+    ]
+    # Copy batches from unprotected chats server-side, up to 100 messages per call
+    BATCH_BULK_COPY = is_enabled(os.environ.get("BATCH_BULK_COPY", "True"), True)
+
+    # Reuse an already saved copy of a file instead of transferring it again
+    MEDIA_DEDUP = is_enabled(os.environ.get("MEDIA_DEDUP", "True"), True)
+    # Notion file uploads are reused for this many seconds, then uploaded again
+    MEDIA_DEDUP_NOTION_MAX_AGE = int(os.environ.get("MEDIA_DEDUP_NOTION_MAX_AGE", 7 * 24 * 3600))
+
+    # Streaming transfers (pipe download into upload without touching disk)
+    STREAM_TRANSFERS = is_enabled(os.environ.get("STREAM_TRANSFERS", "False"), False)
+    STREAM_BUFFER_CHUNKS = int(os.environ.get("STREAM_BUFFER_CHUNKS", 8))
+
+    # Progress messages: seconds between edits of one transfer, and of any transfer in a chat
+    PROGRESS_INTERVAL = int(os.environ.get("PROGRESS_INTERVAL", 10))
+    PROGRESS_CHAT_INTERVAL = int(os.environ.get("PROGRESS_CHAT_INTERVAL", 3))
 
     # Operator
     CLIENTS = {}
+    USER_CLIENTS = {}  # bot user id -> their logged-in User client
     TRANSFERS = {}
 
     ALL_MEDIA_TYPES = {
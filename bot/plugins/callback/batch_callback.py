@@ -12,6 +12,8 @@ from bot.utils import (
     setup_sync_task,
     resolve_chat_id,
     start_background_batch,
+    signal_task,
+    with_live_progress,
     make_batch_menu
 )
 from database import db
@@ -148,6 +150,7 @@ async def update_task_ui(query: CallbackQuery, task_id: int):
     task = await db.batch_tasks.read(task_id)
     if not task:
         return
+    task = with_live_progress(task)
     await query.message.edit_text(format_task_text(task), reply_markup=make_task_markup(task))
 
 
@@ -156,6 +159,7 @@ async def handle_pause(bot: Client, query: CallbackQuery):
     """Pauses the execution of a running batch task"""
     task_id = int(query.data.split("_")[-1])
     await db.batch_tasks.update_status(task_id, "paused")
+    signal_task(task_id, "paused")
     await query.answer("⏸️ Batch paused. Stopping after current item.", show_alert=True)
     await update_task_ui(query, task_id)
 
@@ -180,6 +184,7 @@ async def handle_cancel(bot: Client, query: CallbackQuery):
     """Cancels and stops a running batch task"""
     task_id = int(query.data.split("_")[-1])
     await db.batch_tasks.update_status(task_id, "stopped")
+    signal_task(task_id, "stopped")
     await query.answer("⏹️ Batch task cancelled/stopped.", show_alert=True)
     await update_task_ui(query, task_id)
 
@@ -189,6 +194,7 @@ async def handle_delete(bot: Client, query: CallbackQuery):
     """Deletes a batch task record from the database history"""
     task_id = int(query.data.split("_")[-1])
     await db.batch_tasks.delete(task_id)
+    signal_task(task_id, "stopped")
     await query.answer("❌ Task deleted from history.", show_alert=True)
     await query.message.delete()
 
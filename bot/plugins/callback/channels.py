@@ -1,4 +1,5 @@
 from pyrogram import Client, filters
+from bot.utils.routing import routing_table
 from database import db
 from pyrogram.types import (
     CallbackQuery,
@@ -218,6 +219,7 @@ async def add_channel(bot: Client, message: CallbackQuery):
         destination_title=destination_title,
         topic_id=topic_id,
     )
+    routing_table.invalidate(user_id)
     return await ask_dest.reply(
         f"✅ **Channel pair added successfully!**\n\n"
         f"📢 **Source**: {source_title}\n"
@@ -299,6 +301,7 @@ async def delete_channel(_, message: CallbackQuery):
 async def confirm_delete(_, message: CallbackQuery):
     _id = message.data.split()[1]
     await db.user_channels.delete(ObjectId(_id))
+    routing_table.invalidate(message.from_user.id)
     await channels(_, message)
 
 
@@ -308,6 +311,7 @@ async def toggle_channel(bot, message: CallbackQuery):
     _id = message.data.split()[1]
     channel = await db.user_channels.filter_document({"_id": ObjectId(_id)})
     await db.user_channels.update(ObjectId(_id), {"status": not channel["status"]})
+    routing_table.invalidate(message.from_user.id)
     await view_channel(bot, message)
 
 
@@ -319,6 +323,7 @@ async def toggle_paid_media(bot, message: CallbackQuery):
         ObjectId(_id), 
         {"paid_media.status": not channel["paid_media"]["status"]}
     )
+    routing_table.invalidate(message.from_user.id)
     await view_channel(bot, message)
 
 
@@ -365,6 +370,7 @@ async def edit_stars(bot, message: CallbackQuery):
         ObjectId(_id), 
         {"paid_media.stars": stars}
     )
+    routing_table.invalidate(message.from_user.id)
     
     return await message.message.reply_text(
         f"✅ Stars updated successfully to {stars}",
@@ -168,7 +168,7 @@ async def generate_session(bot: Client, msg: Message):
         reply_markup=InlineKeyboardMarkup(Data.home_buttons),
     )
 
-    client = User(string_session, name=f"user_{user_id}")
+    client = User(string_session, name=f"user_{user_id}", user_id=user_id)
     await client.start()
 
 
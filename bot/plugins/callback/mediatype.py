@@ -1,8 +1,7 @@
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from pyrogram.enums import MessageMediaType
-from bot.utils.media_type import get_media_type, add_media_type, remove_media_type
-from database import db
+from bot.utils.media_type import get_media_type, add_media_type, remove_media_type, set_media_types
 from bot.config import Config
 
 
@@ -90,11 +89,7 @@ async def mediatype_enable_all(bot: Client, query: CallbackQuery):
     all_media_types = list(Config.ALL_MEDIA_TYPES.keys())
     
     # Set all media types as enabled
-    await db.config.col.update_one(
-        {"name": "media_type"}, 
-        {"$set": {"value": all_media_types}},
-        upsert=True
-    )
+    await set_media_types(all_media_types)
     
     await query.answer("✅ All media types enabled!", show_alert=True)
     await mediatype_toggle_view(bot, query)
@@ -104,11 +99,7 @@ async def mediatype_enable_all(bot: Client, query: CallbackQuery):
 async def mediatype_disable_all(bot: Client, query: CallbackQuery):
     """Disable all media types"""
     # Set empty list
-    await db.config.col.update_one(
-        {"name": "media_type"}, 
-        {"$set": {"value": []}},
-        upsert=True
-    )
+    await set_media_types([])
     
     await query.answer("❌ All media types disabled!", show_alert=True)
     await mediatype_toggle_view(bot, query)
@@ -126,11 +117,7 @@ async def mediatype_reset(bot: Client, query: CallbackQuery):
     ]
     
     # Clear existing and set default
-    await db.config.col.update_one(
-        {"name": "media_type"}, 
-        {"$set": {"value": default_media_types}},
-        upsert=True
-    )
+    await set_media_types(default_media_types)
     
     await query.answer("🔄 Reset to default media types!", show_alert=True)
     await mediatype_toggle_view(bot, query)
@@ -33,9 +33,9 @@ async def mediatype_command(bot: Client, message: Message):
     text += "Current enabled media types:\n"
     
     if current_media_types:
-        for media_type in current_media_types:
-            if media_type in all_media_types:
-                text += f"• {all_media_types[media_type]}\n"
+        for media_type, display_name in all_media_types.items():
+            if media_type in current_media_types:
+                text += f"• {display_name}\n"
     else:
         text += "• None selected\n"
     
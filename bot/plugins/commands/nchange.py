@@ -5,6 +5,7 @@ from pyrogram.types import (CallbackQuery, InlineKeyboardButton,
                             InlineKeyboardMarkup, Message)
 
 from bot.config import Config
+from bot.utils.notion_indexer import notion_page_cache
 from database import db
 
 
@@ -75,6 +76,7 @@ async def nchange_callback(bot: Client, query: CallbackQuery):
         
         # Update in memory Config
         Config.NOTION_PARENT_PAGE_ID = str(page_id)
+        notion_page_cache.invalidate()
         
         await query.answer("✅ Notion Page ID updated!", show_alert=True)
         await query.message.edit(
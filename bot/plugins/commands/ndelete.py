@@ -10,6 +10,7 @@ import logging
 from pyrogram import Client, filters, types
 
 from bot.utils import check_admin
+from bot.utils.notion_indexer import notion_page_cache
 
 logger = logging.getLogger(__name__)
 from database import db
@@ -163,6 +164,7 @@ async def ndelete_pages(bot: Client, message: types.Message):
 
         if len(message.command) > 1 and message.command[1].lower() == "confirm":
             deleted_count = await db.notion_mapping.delete_many({})
+            notion_page_cache.invalidate()
             await message.reply_text(f"✅ Deleted **{deleted_count}** Notion page mappings from the database.")
         else:
             await message.reply_text("❌ Invalid argument. Use `/ndelete_pages confirm` to delete all mappings.")
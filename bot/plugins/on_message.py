@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import random
 
@@ -16,8 +15,9 @@ from bot.utils import (
     is_transfer_cancelled,
     is_valid_link,
     remove_transfer_from_queue,
+    update_transfer,
 )
-from bot.utils.notion_indexer import index_messages_to_notion
+from bot.utils.scheduler import note_success, pace, run_in_order
 from database import db
 
 
@@ -36,7 +36,6 @@ async def on_https_message(bot: Client, message: types.Message, **kwargs):
     user_message = message
     is_batch = kwargs.get("is_batch", False)
     notion_enabled = kwargs.get("notion_enabled", True)
-    link = None
 
     if not is_valid_link(message):
         return await message.reply_text("Invalid link.")
@@ -74,171 +73,227 @@ async def on_https_message(bot: Client, message: types.Message, **kwargs):
     if not links:
         return await message.reply_text("No links found.")
 
-    success, failed, not_allowed, deleted = 0, 0, 0, 0
     out = await bot.floodwait_handler(
         bot.send_message, user_id, f"Processing {len(links)} links..."
     )
     await (await out.pin(both_sides=True)).delete()
 
-    for i, link in enumerate(links, 1):
-        parts = get_link_parts(link)
-
-        if not parts:
-            failed += 1
-            await bot.floodwait_handler(
-                bot.send_message, user_id, f"Invalid link - {link}"
-            )
-            continue
+    # A single transfer covers every link of the message, so one cancel stops them all
+    download_id = random.randint(100000, 999999)
+    await add_transfer_to_queue(
+        user_id=user_id,
+        download_id=download_id,
+        links=links,
+        link_index=0,
+        status=TransferStatus.IN_PROGRESS.value,
+        user_message_id=user_message.id,
+        user_message_chat_id=user_message.chat.id,
+    )
 
-        chat_id, message_id, topic_id = parts
+    run = {
+        "stop": False,
+        "pending": set(range(len(links))),
+        "running": {},
+        "counts": {"success": 0, "failed": 0},
+    }
 
+    async def worker(i, link):
         try:
-            error_message = ""
-            chat = None
-            try:
-                chat = await app.get_chat(chat_id)
-            except Exception as e:
-                error_message += f"Error: {e}\n"
-                continue
-
-            if chat is None:
-                try:
-                    chat = await app.get_users(chat_id)
-                except Exception as e:
-                    error_message += f"Error: {e}\n"
-                    continue
-
-            if chat is None:
-                raise Exception(f"Could not access chat {chat_id} {error_message}")
-        except errors.AuthKeyDuplicated:
-            await db.users.remove_session(user_id)
-            await out.unpin()
-            return await out.edit(
-                "Your session has expired. Please login again.",
-                reply_markup=types.InlineKeyboardMarkup(
-                    [
-                        [
-                            types.InlineKeyboardButton(
-                                "Login", callback_data="connected_account"
-                            )
-                        ]
-                    ]
-                ),
+            result = await process_link(
+                bot, app, user_id, link, i, links, out, download_id, notion_enabled, is_batch, run
             )
         except Exception as e:
-            failed += 1
-            logging.error(f"Failed to access chat {chat_id}: {e}")
-            text = "⚠️ Unable to access the content!\n\n"
-            text += "🔹 Please join the channel first and try again\n"
-            text += "🔹 For private chats:\n"
-            text += "- First time: Use their @username\n"
-            text += "- Next time: You can use their User ID\n"
-            text += "🔹 Make sure you have access to this chat"
-            text += f"\n\n💡 Chat: {chat_id}\n\n💡 Error: {error_message}"
-
-            await bot.floodwait_handler(bot.send_message, user_id, text)
-            if is_batch:
-                logging.info(f"Batch transfer cancelled for message {message.link}")
-                break
-            continue
-
-        if topic_id:
-            message_ids = topic_id
-        else:
-            message_ids = message_id
-
-        try:
-            message = await bot.floodwait_handler(
-                app.get_messages, chat_id, message_ids
-            )
-        except Exception as e:
-            failed += 1
-            logging.error(f"Message not found for link {link}: {e}")
-            await bot.floodwait_handler(
-                bot.send_message, user_id, f"Message not found - {link}"
-            )
-            continue
-
-        if message.empty or message.sticker or message.service:
-            deleted += 1
-            continue
-
+            logging.exception(f"Error processing link {link}: {e}")
+            result = "failed"
+
+        if result in run["counts"]:
+            run["counts"][result] += 1
+
+        run["pending"].discard(i - 1)
+        link_index = min(run["pending"]) if run["pending"] else len(links)
+        await update_transfer(download_id, link_index=link_index)
+        return result
+
+    results = await run_in_order(
+        app,
+        links,
+        worker,
+        should_stop=lambda: run["stop"] or is_transfer_cancelled(download_id),
+    )
 
-        allowed_media_types = await get_media_type()
+    if "expired" in results:
+        await remove_transfer_from_queue(download_id)
+        await db.users.remove_session(user_id)
+        await out.unpin()
+        return await out.edit(
+            "Your session has expired. Please login again.",
+            reply_markup=types.InlineKeyboardMarkup(
+                [
+                    [
+                        types.InlineKeyboardButton(
+                            "Login", callback_data="connected_account"
+                        )
+                    ]
+                ]
+            ),
+        )
 
-        if message.media and message.media.value not in allowed_media_types:
-            not_allowed += 1
-            continue
+    await remove_transfer_from_queue(download_id)
+    await out.delete()
 
-        if message.text and "text" not in allowed_media_types:
-            not_allowed += 1
-            continue
+    done = [i for i, result in enumerate(results) if result is not None]
+    link = links[done[-1]] if done else None
 
-        download_id = random.randint(100000, 999999)
-        message.download_id = download_id
-        message.index = f"{i} of {len(links)}"
+    reply_text = (
+        f"Downloaded {len(done)} of {len(links)} links\n"
+        f"Success: {results.count('success')}\n"
+        f"Failed: {results.count('failed')}\n"
+        f"Not Allowed types: {results.count('not_allowed')}\n"
+        f"Deleted: {results.count('deleted')}"
+        f"\n\nLast link: {link}"
+    )
+    await bot.floodwait_handler(
+        bot.send_message,
+        user_id,
+        reply_text,
+    )
 
-        await add_transfer_to_queue(
-            user_id=user_id,
-            download_id=download_id,
-            links=links,
-            link_index=i - 1,
-            status=TransferStatus.IN_PROGRESS.value,
-            user_message_id=user_message.id,
-            user_message_chat_id=user_message.chat.id,
-        )
 
-        progress_text = f"Downloading: {i} of {len(links)}\n"
-        progress_text += f"Success: {success}\n"
-        progress_text += f"Failed: {failed}"
-        progress_text += f"\n\nRunning: {message.link}"
+async def update_progress_message(bot: Client, out: types.Message, links: list, download_id: int, run: dict):
+    """Show the links currently being transferred in the pinned status message"""
+    done = len(links) - len(run["pending"])
+    progress_text = f"Downloading: {done} of {len(links)}\n"
+    progress_text += f"Success: {run['counts']['success']}\n"
+    progress_text += f"Failed: {run['counts']['failed']}"
+    progress_text += "\n\nRunning:\n" + "\n".join(run["running"].values())
 
+    try:
         await bot.floodwait_handler(
             out.edit_text, progress_text, reply_markup=CANCEL_MARKUP(download_id)
         )
+    except errors.MessageNotModified:
+        pass
+
+
+async def process_link(
+    bot: Client,
+    app: Client,
+    user_id: int,
+    link: str,
+    i: int,
+    links: list,
+    out: types.Message,
+    download_id: int,
+    notion_enabled: bool,
+    is_batch: bool,
+    run: dict,
+):
+    """Transfer a single link and return its outcome
+
+    Returns one of "success", "failed", "not_allowed", "deleted",
+    "cancelled", "expired", or "ignored" when the chat lookup was skipped.
+    """
+    parts = get_link_parts(link)
+
+    if not parts:
+        await bot.floodwait_handler(
+            bot.send_message, user_id, f"Invalid link - {link}"
+        )
+        return "failed"
+
+    chat_id, message_id, topic_id = parts
 
+    try:
+        error_message = ""
+        chat = None
         try:
-            await forward_message(bot, app, message, user_id, notion_enabled=notion_enabled)
-        except CancelledError:
-            logging.info(f"1. Transfer cancelled for message {message.link}")
-            await remove_transfer_from_queue(download_id)
-            break
+            chat = await app.get_chat(chat_id)
         except Exception as e:
-            failed += 1
-            logging.exception(f"Error forwarding message {message.link}: {e}")
-            await remove_transfer_from_queue(download_id)
-            await bot.floodwait_handler(
-                bot.send_message, user_id, f"Error: {e}: {message.link}"
-            )
-            continue
+            error_message += f"Error: {e}\n"
+            return "ignored"
 
-        if is_transfer_cancelled(message.download_id):
-            logging.info(f"2. Transfer cancelled for message {message.link}")
-            break
+        if chat is None:
+            try:
+                chat = await app.get_users(chat_id)
+            except Exception as e:
+                error_message += f"Error: {e}\n"
+                return "ignored"
+
+        if chat is None:
+            raise Exception(f"Could not access chat {chat_id} {error_message}")
+    except errors.AuthKeyDuplicated:
+        run["stop"] = True
+        return "expired"
+    except Exception as e:
+        logging.error(f"Failed to access chat {chat_id}: {e}")
+        text = "⚠️ Unable to access the content!\n\n"
+        text += "🔹 Please join the channel first and try again\n"
+        text += "🔹 For private chats:\n"
+        text += "- First time: Use their @username\n"
+        text += "- Next time: You can use their User ID\n"
+        text += "🔹 Make sure you have access to this chat"
+        text += f"\n\n💡 Chat: {chat_id}\n\n💡 Error: {error_message}"
+
+        await bot.floodwait_handler(bot.send_message, user_id, text)
+        if is_batch:
+            logging.info(f"Batch transfer cancelled for link {link}")
+            run["stop"] = True
+        return "failed"
+
+    if topic_id:
+        message_ids = topic_id
+    else:
+        message_ids = message_id
+
+    try:
+        message = await bot.floodwait_handler(
+            app.get_messages, chat_id, message_ids
+        )
+    except Exception as e:
+        logging.error(f"Message not found for link {link}: {e}")
+        await bot.floodwait_handler(
+            bot.send_message, user_id, f"Message not found - {link}"
+        )
+        return "failed"
 
-        await remove_transfer_from_queue(download_id)
-        success += 1
+    if message.empty or message.sticker or message.service:
+        return "deleted"
 
-        # Index messages to Notion
-        try:
-            await index_messages_to_notion()
-        except Exception as e:
-            logging.error(f"Notion indexing failed: {e}")
+    allowed_media_types = await get_media_type()
 
-        await asyncio.sleep(Config.SLEEP_TIME)
+    if message.media and message.media.value not in allowed_media_types:
+        return "not_allowed"
 
-    await out.delete()
+    if message.text and "text" not in allowed_media_types:
+        return "not_allowed"
 
-    reply_text = (
-        f"Downloaded {i} of {len(links)} links\n"
-        f"Success: {success}\n"
-        f"Failed: {failed}\n"
-        f"Not Allowed types: {not_allowed}\n"
-        f"Deleted: {deleted}"
-        f"\n\nLast link: {link}"
-    )
-    await bot.floodwait_handler(
-        bot.send_message,
-        user_id,
-        reply_text,
-    )
+    message.download_id = download_id
+    message.index = f"{i} of {len(links)}"
+
+    await pace(app)
+
+    run["running"][i] = message.link
+    await update_progress_message(bot, out, links, download_id, run)
+
+    try:
+        await forward_message(bot, app, message, user_id, notion_enabled=notion_enabled)
+    except CancelledError:
+        logging.info(f"1. Transfer cancelled for message {message.link}")
+        run["stop"] = True
+        return "cancelled"
+    except Exception as e:
+        logging.exception(f"Error forwarding message {message.link}: {e}")
+        await bot.floodwait_handler(
+            bot.send_message, user_id, f"Error: {e}: {message.link}"
+        )
+        return "failed"
+    finally:
+        run["running"].pop(i, None)
+
+    if is_transfer_cancelled(message.download_id):
+        logging.info(f"2. Transfer cancelled for message {message.link}")
+        run["stop"] = True
+        return "cancelled"
+
+    note_success(app)
+    return "success"
@@ -14,9 +14,12 @@ import tempfile
 logger = logging.getLogger(__name__)
 import zipfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 import rarfile
 
+# Bytes copied per read when extracting a member
+COPY_CHUNK_SIZE = 1024 * 1024
+
 
 class ArchiveHandlerError(Exception):
     """Custom exception for archive handling errors"""
@@ -31,6 +34,15 @@ class ExtractedFile:
         self.size = size
         self.name = os.path.basename(path)
 
+    def cleanup(self):
+        """Delete the extracted file once it's no longer needed"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to remove {self.path}: {e}")
+
 
 def is_archive(file_path: str) -> bool:
     """
@@ -49,6 +61,8 @@ def is_archive(file_path: str) -> bool:
 def extract_archive(
     archive_path: str,
     extract_to: Optional[str] = None,
+    max_files: Optional[int] = None,
+    max_total_size: Optional[int] = None,
 ) -> List[ExtractedFile]:
     """
     Extract archive file (.zip or .rar) to a directory.
@@ -56,6 +70,8 @@ def extract_archive(
     Args:
         archive_path: Path to the archive file
         extract_to: Directory to extract to (defaults to temp directory)
+        max_files: Maximum number of files in the archive
+        max_total_size: Maximum total size of extracted files in bytes
     
     Returns:
         List of ExtractedFile objects
@@ -67,103 +83,121 @@ def extract_archive(
     if not os.path.exists(archive_path):
         raise FileNotFoundError(f"Archive not found: {archive_path}")
     
-    ext = Path(archive_path).suffix.lower()
-    
     # Create extraction directory
     if extract_to is None:
         extract_to = tempfile.mkdtemp(prefix="archive_extract_")
-    else:
-        os.makedirs(extract_to, exist_ok=True)
-    
-    extracted_files = []
 
     try:
-        if ext == '.zip':
-            extracted_files = _extract_zip(
-                archive_path, extract_to
-            )
-        elif ext == '.rar':
-            extracted_files = _extract_rar(
-                archive_path, extract_to
-            )
-        else:
-            raise ArchiveHandlerError(f"Unsupported archive format: {ext}")
-        
-        return extracted_files
-    
-    except Exception as e:
+        return list(iter_archive_members(archive_path, extract_to, max_files, max_total_size))
+    except Exception:
         # Clean up on error
         if extract_to and os.path.exists(extract_to):
             shutil.rmtree(extract_to, ignore_errors=True)
-        raise ArchiveHandlerError(f"Failed to extract archive: {str(e)}") from e
+        raise
 
 
-def _extract_zip(
-    zip_path: str,
+def iter_archive_members(
+    archive_path: str,
     extract_to: str,
-) -> List[ExtractedFile]:
-    """Extract ZIP archive"""
-    extracted_files = []
-    total_size = 0
-    
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        # Get list of files (excluding directories)
-
-        
-        # Check total size before extraction
-        for file_info in zip_ref.infolist():
-            if not file_info.is_dir():
-                total_size += file_info.file_size
-        
-
-        
-        # Extract all files
-        zip_ref.extractall(extract_to)
-        
-        # Build list of extracted files
-        for file_info in zip_ref.infolist():
-            if not file_info.is_dir():
-                full_path = os.path.join(extract_to, file_info.filename)
-                if os.path.exists(full_path):
-                    extracted_files.append(ExtractedFile(
-                        path=full_path,
-                        relative_path=file_info.filename,
-                        size=file_info.file_size
-                    ))
-    
-    return extracted_files
+    max_files: Optional[int] = None,
+    max_total_size: Optional[int] = None,
+) -> Iterator[ExtractedFile]:
+    """
+    Extract archive members one at a time, yielding each file as soon as it's written.
 
+    Limits are checked against the archive listing before anything is written,
+    so disk use stays bounded by the files the consumer hasn't cleaned up yet.
+    The caller owns ``extract_to`` and should call ``ExtractedFile.cleanup``
+    on each file once it's done with it.
 
-def _extract_rar(
-    rar_path: str,
-    extract_to: str,
-) -> List[ExtractedFile]:
-    """Extract RAR archive"""
-    extracted_files = []
-    total_size = 0
-    
-    with rarfile.RarFile(rar_path, 'r') as rar_ref:
-        # Check total size before extraction
-        for file_info in rar_ref.infolist():
-            if not file_info.isdir():
-                total_size += file_info.file_size
-        
-
-        # Extract all files
-        rar_ref.extractall(extract_to)
-        
-        # Build list of extracted files
-        for file_info in rar_ref.infolist():
-            if not file_info.isdir():
-                full_path = os.path.join(extract_to, file_info.filename)
-                if os.path.exists(full_path):
-                    extracted_files.append(ExtractedFile(
-                        path=full_path,
-                        relative_path=file_info.filename,
-                        size=file_info.file_size
-                    ))
-    
-    return extracted_files
+    Args:
+        archive_path: Path to the archive file
+        extract_to: Directory to extract to
+        max_files: Maximum number of files in the archive
+        max_total_size: Maximum total size of extracted files in bytes
+
+    Yields:
+        ExtractedFile objects, in archive order
+
+    Raises:
+        ArchiveHandlerError: If extraction fails or limits are exceeded
+        FileNotFoundError: If archive doesn't exist
+    """
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"Archive not found: {archive_path}")
+
+    ext = Path(archive_path).suffix.lower()
+    if ext == '.zip':
+        opener, is_dir = zipfile.ZipFile, lambda info: info.is_dir()
+    elif ext == '.rar':
+        opener, is_dir = rarfile.RarFile, lambda info: info.isdir()
+    else:
+        raise ArchiveHandlerError(f"Unsupported archive format: {ext}")
+
+    os.makedirs(extract_to, exist_ok=True)
+
+    try:
+        with opener(archive_path, 'r') as archive:
+            members = [info for info in archive.infolist() if not is_dir(info)]
+            _check_limits(members, max_files, max_total_size)
+
+            written = 0
+            for info in members:
+                target = _get_safe_path(extract_to, info.filename)
+                if not target:
+                    logger.warning(f"Skipping unsafe archive member: {info.filename}")
+                    continue
+
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.open(info) as source, open(target, 'wb') as destination:
+                    written = _copy_limited(source, destination, written, max_total_size)
+
+                yield ExtractedFile(
+                    path=target,
+                    relative_path=info.filename,
+                    size=info.file_size
+                )
+    except ArchiveHandlerError:
+        raise
+    except Exception as e:
+        raise ArchiveHandlerError(f"Failed to extract archive: {str(e)}") from e
+
+
+def _check_limits(members: list, max_files: Optional[int], max_total_size: Optional[int]):
+    """Refuse archives over the file count or uncompressed size limits"""
+    if max_files is not None and len(members) > max_files:
+        raise ArchiveHandlerError(
+            f"Archive has {len(members)} files, the limit is {max_files}"
+        )
+
+    total_size = sum(info.file_size for info in members)
+    if max_total_size is not None and total_size > max_total_size:
+        raise ArchiveHandlerError(
+            f"Archive expands to {total_size} bytes, the limit is {max_total_size}"
+        )
+
+
+def _get_safe_path(extract_to: str, member_name: str) -> Optional[str]:
+    """Resolve a member path inside extract_to, None if it would escape it"""
+    root = os.path.abspath(extract_to)
+    target = os.path.abspath(os.path.join(root, member_name))
+    if os.path.commonpath([root, target]) != root or target == root:
+        return None
+    return target
+
+
+def _copy_limited(source, destination, written: int, max_total_size: Optional[int]) -> int:
+    """Copy a member, enforcing the total size limit on the bytes actually written"""
+    while True:
+        chunk = source.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if max_total_size is not None and written > max_total_size:
+            raise ArchiveHandlerError(
+                f"Archive expands past the {max_total_size} bytes limit"
+            )
+        destination.write(chunk)
 
 
 def cleanup_extracted_files(extract_dir: str):
@@ -1,17 +1,89 @@
 import asyncio
 import logging
 import random
+import time
+from collections import deque
 from datetime import datetime
-from pyrogram import Client
+from typing import Callable, Dict
+from pyrogram import Client, errors
+from pyrogram.enums import ChatMemberStatus, ChatType
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from bot.config import Config
 from bot.enums import TransferStatus
-from bot.utils import get_link_parts, get_user_client, get_media_type, forward_message, is_input_cancelled
+from bot.utils import (
+    copy_message_group,
+    forward_message,
+    get_link_parts,
+    get_media_type,
+    get_user_client,
+    is_chat_copyable,
+)
+from bot.utils.routing import routing_table
+from bot.utils.scheduler import get_pacing_stats, note_success, pace
 from database import db
 
 logger = logging.getLogger(__name__)
 
-RUNNING_TASKS = set()
+# Telegram returns at most 200 messages per GetMessages call
+PREFETCH_WINDOW = 200
+# Seconds after which prefetched messages are re-fetched before forwarding
+PREFETCH_MAX_AGE = 30 * 60
+
+# Telegram forwards at most 100 messages per call
+BULK_COPY_SIZE = 100
+
+# Progress is written to the task document every this many ids or seconds
+CHECKPOINT_EVERY = 100
+CHECKPOINT_INTERVAL = 30
+
+
+class BatchControl:
+    """In-process state of a running batch task
+
+    The pause and cancel callbacks signal the loop through this object
+    instead of the loop polling the task document, and it holds the progress
+    made since the last checkpoint.
+    """
+
+    def __init__(self):
+        self.status = "running"
+        self.current_message_id = None
+        self.processed_count = 0
+        self.pending_ids = 0
+        self.checkpointed_at = time.monotonic()
+
+    @property
+    def is_running(self) -> bool:
+        return self.status == "running"
+
+    def signal(self, status: str):
+        self.status = status
+
+
+# task_id -> control of every batch task running in this process
+RUNNING_TASKS: Dict[int, BatchControl] = {}
+
+
+def signal_task(task_id: int, status: str):
+    """Tell a running batch loop to pause or stop after its current message"""
+    control = RUNNING_TASKS.get(task_id)
+    if control:
+        control.signal(status)
+
+
+def with_live_progress(task: dict) -> dict:
+    """Overlay progress not yet checkpointed onto a task document"""
+    control = RUNNING_TASKS.get(task["_id"])
+    if not control or control.current_message_id is None:
+        return task
+
+    app = Config.USER_CLIENTS.get(task["user_id"])
+    return {
+        **task,
+        "current_message_id": control.current_message_id,
+        "processed_count": control.processed_count,
+        "pacing": get_pacing_stats(app) if app else None,
+    }
 
 
 def make_batch_menu(notion_enabled: bool) -> tuple[str, InlineKeyboardMarkup]:
@@ -81,8 +153,17 @@ def format_task_text(task: dict) -> str:
         f"**Saved**: `{task['processed_count']}` messages\n"
         f"**Started**: {started_at} ({running_since})\n"
         f"**Links**: [Current]({msg_link}) | [Last]({last_msg_link})\n\n"
-        f"ℹ️ __Empty, deleted, or unsupported messages in the range are skipped.__"
     )
+
+    pacing = task.get("pacing")
+    if pacing:
+        waits = ", ".join(f"{seconds}s" for seconds in pacing["recent_waits"]) or "none"
+        text += (
+            f"**Rate**: `{pacing['rate'] * 60:.1f}` msgs/min\n"
+            f"**Recent FloodWaits**: `{waits}`\n\n"
+        )
+
+    text += "ℹ️ __Empty, deleted, or unsupported messages in the range are skipped.__"
     return text
 
 
@@ -294,8 +375,10 @@ async def get_latest_message_id(app: Client, chat_id: int) -> int:
 async def start_background_batch(bot: Client, user_id: int, task_id: int):
     """Launch the async processing loop in the background"""
     if task_id in RUNNING_TASKS:
+        # Paused but still finishing its last message, keep it going
+        RUNNING_TASKS[task_id].signal("running")
         return
-    RUNNING_TASKS.add(task_id)
+    RUNNING_TASKS[task_id] = BatchControl()
     asyncio.create_task(process_batch_task(bot, user_id, task_id))
 
 
@@ -314,38 +397,367 @@ async def process_batch_task(bot: Client, user_id: int, task_id: int):
     app, task = await load_task_context(task_id, user_id)
     if not app or not task:
         return
+    control = RUNNING_TASKS[task_id]
     try:
-        processed_count = await run_batch_loop(bot, app, task, task_id, user_id)
+        processed_count = await run_batch_loop(bot, app, task, task_id, user_id, control)
         await complete_or_pause_task(bot, task_id, user_id, processed_count)
     except Exception as e:
         logger.error(f"Error in task {task_id}: {e}")
         await db.batch_tasks.update_status(task_id, "failed")
+        await bot.suppress(
+            bot.send_message,
+            user_id,
+            f"❌ Batch task #{task_id} failed at message {control.current_message_id}: {e}",
+        )
     finally:
-        RUNNING_TASKS.discard(task_id)
+        RUNNING_TASKS.pop(task_id, None)
 
 
-async def check_task_active(task_id: int) -> bool:
-    """Check if task is still running in database"""
-    task = await db.batch_tasks.read(task_id)
-    return task is not None and task.get("status") == "running"
+async def checkpoint_progress(task_id: int, control: BatchControl, force: bool = False):
+    """Write progress to the task document every CHECKPOINT_EVERY ids or CHECKPOINT_INTERVAL seconds"""
+    control.pending_ids += 1
+    if not force and (
+        control.pending_ids < CHECKPOINT_EVERY
+        and time.monotonic() - control.checkpointed_at < CHECKPOINT_INTERVAL
+    ):
+        return
+    await db.batch_tasks.update_progress(
+        task_id, control.current_message_id, control.processed_count
+    )
+    control.pending_ids = 0
+    control.checkpointed_at = time.monotonic()
 
 
-async def run_batch_loop(bot: Client, app: Client, task: dict, task_id: int, user_id: int) -> int:
+async def checkpoint_running_tasks():
+    """Persist the progress of every running batch task, e.g. on shutdown"""
+    for task_id, control in list(RUNNING_TASKS.items()):
+        if control.current_message_id is not None:
+            await db.batch_tasks.update_progress(
+                task_id, control.current_message_id, control.processed_count
+            )
+
+
+async def run_batch_loop(
+    bot: Client, app: Client, task: dict, task_id: int, user_id: int, control: BatchControl
+) -> int:
     """Execute message range loop updating progress"""
     start_id = task["current_message_id"]
     end_id = task["last_message_id"]
     chat_id = task["source_chat_id"]
     notion = task.get("notion_enabled", False)
-    count = task.get("processed_count", 0)
 
-    for msg_id in range(start_id, end_id + 1):
-        if not await check_task_active(task_id):
-            break
-        await db.batch_tasks.update_progress(task_id, msg_id, count)
-        success = await process_message_item(bot, app, chat_id, msg_id, user_id, notion)
-        count += 1 if success else 0
-        await asyncio.sleep(Config.SLEEP_TIME)
-    return count
+    control.current_message_id = start_id
+    control.processed_count = task.get("processed_count", 0)
+    try:
+        accounts = await get_batch_accounts(app, chat_id)
+        if len(accounts) > 1:
+            logger.info(f"Task {task_id} shared across {len(accounts)} accounts")
+        bulk = await can_bulk_copy(bot, app, user_id, chat_id, notion)
+        if bulk:
+            logger.info(f"Task {task_id} copies messages in bulk")
+        await _run_batch_range(
+            bot, accounts, chat_id, start_id, end_id, user_id, notion, task_id, control, bulk
+        )
+    finally:
+        # Always persist where we stopped, so a resume starts exactly there
+        await checkpoint_progress(task_id, control, force=True)
+    return control.processed_count
+
+
+async def can_bulk_copy(bot: Client, app: Client, user_id: int, chat_id: int, notion: bool) -> bool:
+    """
+    Check if a task can copy messages server-side, many ids per call.
+
+    Needs Config.BATCH_BULK_COPY, an unprotected source and no Notion upload
+    (which needs every file on disk). Paid media posts are sent one by one,
+    so a source with a paid media destination isn't eligible either.
+    """
+    if not Config.BATCH_BULK_COPY or notion:
+        return False
+    if not await is_chat_copyable(app, chat_id):
+        return False
+    routes = await routing_table.get_routes(bot, user_id, chat_id)
+    return not any(route["paid_media"]["status"] for route in routes)
+
+
+async def get_batch_accounts(app: Client, chat_id: int) -> list:
+    """
+    Get the accounts a batch task runs on.
+
+    Always the task owner's account, plus every connected account listed in
+    Config.BATCH_WORKER_ACCOUNTS that can read the source chat and post to
+    Config.FILES_LOG. Forum topics are still resolved with the owner's account,
+    see fetch_message_window.
+    """
+    accounts = [app]
+    for account_id in Config.BATCH_WORKER_ACCOUNTS:
+        client = Config.CLIENTS.get(account_id)
+        if not client or client is app or not client.is_connected:
+            continue
+        try:
+            await client.get_chat(chat_id)
+        except Exception as e:
+            logger.debug(f"Account {client.name} can't read chat {chat_id}: {e}")
+            continue
+        if not await can_post(client, Config.FILES_LOG):
+            logger.warning(f"Account {client.name} can't post to FILES_LOG, not used for batches")
+            continue
+        accounts.append(client)
+    return accounts
+
+
+async def can_post(client: Client, chat_id: int) -> bool:
+    """Check if the account may send messages to a chat"""
+    try:
+        chat = await client.get_chat(chat_id)
+        member = await client.get_chat_member(chat_id, "me")
+    except Exception as e:
+        logger.debug(f"Account {client.name} has no access to chat {chat_id}: {e}")
+        return False
+
+    if member.status in (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR):
+        return chat.type != ChatType.CHANNEL or bool(
+            member.privileges and member.privileges.can_post_messages
+        )
+    if chat.type == ChatType.CHANNEL:
+        return False
+    if member.status == ChatMemberStatus.RESTRICTED:
+        return bool(member.permissions and member.permissions.can_send_messages)
+    return member.status == ChatMemberStatus.MEMBER
+
+
+async def _run_batch_range(
+    bot: Client,
+    accounts: list,
+    chat_id: int,
+    start_id: int,
+    end_id: int,
+    user_id: int,
+    notion: bool,
+    task_id: int,
+    control: BatchControl,
+    bulk: bool = False,
+):
+    """
+    Process a message range with every account pulling the next PREFETCH_WINDOW
+    ids off a shared queue, so faster or less rate-limited accounts take more.
+
+    The task's current_message_id is the lowest id not yet done by any
+    account, so a resume never skips a message. With several accounts, messages
+    past that id may be forwarded again after a pause, and messages reach the
+    destination out of order.
+    """
+    windows = deque(
+        (first, min(first + PREFETCH_WINDOW - 1, end_id))
+        for first in range(start_id, end_id + 1, PREFETCH_WINDOW)
+    )
+    # worker -> id it is working on
+    positions = {}
+
+    def set_position(worker: int, msg_id: int = None):
+        if msg_id is None:
+            positions.pop(worker, None)
+        else:
+            positions[worker] = msg_id
+        pending = list(positions.values())
+        if windows:
+            pending.append(windows[0][0])
+        control.current_message_id = min(pending) if pending else end_id
+
+    async def worker(number: int, app: Client):
+        try:
+            while windows and control.is_running:
+                first, last = windows.popleft()
+                set_position(number, first)
+                run_window = _copy_batch_window if bulk else _run_batch_window
+                finished = await run_window(
+                    bot,
+                    app,
+                    chat_id,
+                    first,
+                    last,
+                    user_id,
+                    notion,
+                    task_id,
+                    control,
+                    lambda msg_id: set_position(number, msg_id),
+                    accounts[0],
+                )
+                if finished:
+                    set_position(number)
+        except Exception:
+            # Stop the other accounts too, the task is marked failed
+            control.signal("failed")
+            raise
+
+    results = await asyncio.gather(
+        *[worker(number, app) for number, app in enumerate(accounts)],
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def _run_batch_window(
+    bot: Client,
+    app: Client,
+    chat_id: int,
+    first: int,
+    last: int,
+    user_id: int,
+    notion: bool,
+    task_id: int,
+    control: BatchControl,
+    set_position: Callable[[int], None],
+    topic_client: Client,
+) -> bool:
+    """Forward one window of ids on one account, returns False if the task stopped midway"""
+    window = await fetch_message_window(
+        bot, app, chat_id, list(range(first, last + 1)), topic_client
+    )
+    fetched_at = time.monotonic()
+
+    for msg_id in range(first, last + 1):
+        if not control.is_running:
+            return False
+        set_position(msg_id)
+        await checkpoint_progress(task_id, control)
+
+        # Cached in memory, so settings changes apply from the next message
+        allowed_media = await get_media_type()
+        message = window.pop(msg_id, None)
+        if not is_message_allowed(message, allowed_media):
+            continue
+
+        # File references go stale, so re-fetch survivors of an old window
+        if time.monotonic() - fetched_at > PREFETCH_MAX_AGE:
+            message = await bot.floodwait_handler(app.get_messages, chat_id, msg_id)
+            if message:
+                message.topic_client = topic_client
+            if not is_message_allowed(message, allowed_media):
+                continue
+
+        await pace(app)
+        success = await process_message_item(bot, app, message, user_id, notion)
+        if success:
+            control.processed_count += 1
+            note_success(app)
+    return True
+
+
+async def _copy_batch_window(
+    bot: Client,
+    app: Client,
+    chat_id: int,
+    first: int,
+    last: int,
+    user_id: int,
+    notion: bool,
+    task_id: int,
+    control: BatchControl,
+    set_position: Callable[[int], None],
+    topic_client: Client,
+) -> bool:
+    """Copy one window of ids in groups of up to BULK_COPY_SIZE messages per call and topic"""
+    if not await is_chat_copyable(app, chat_id):
+        # Protection was turned on mid-task
+        return await _run_batch_window(
+            bot,
+            app,
+            chat_id,
+            first,
+            last,
+            user_id,
+            notion,
+            task_id,
+            control,
+            set_position,
+            topic_client,
+        )
+
+    window = await fetch_message_window(
+        bot, app, chat_id, list(range(first, last + 1)), topic_client
+    )
+    allowed_media = await get_media_type()
+
+    async def flush(group: list):
+        set_position(group[0].id)
+        await pace(app)
+        try:
+            await copy_message_group(bot, app, group, user_id)
+        except errors.ChatForwardsRestricted:
+            # Protection was turned on mid-task, transfer the group one by one
+            for message in group:
+                if not control.is_running:
+                    return
+                set_position(message.id)
+                await pace(app)
+                if await process_message_item(bot, app, message, user_id, notion):
+                    control.processed_count += 1
+                    note_success(app)
+                set_position(message.id + 1)
+            await checkpoint_progress(task_id, control)
+            return
+        control.processed_count += len(group)
+        note_success(app)
+        # Resume after the group, it's already in every destination
+        set_position(group[-1].id + 1)
+        await checkpoint_progress(task_id, control)
+
+    group = []
+    group_topic_id = None
+    for msg_id in range(first, last + 1):
+        message = window.pop(msg_id, None)
+        if not is_message_allowed(message, allowed_media):
+            continue
+
+        # Messages of different topics go to different threads
+        topic_id = message.topic.id if message.topic else None
+        if group and (len(group) >= BULK_COPY_SIZE or topic_id != group_topic_id):
+            if not control.is_running:
+                return False
+            await flush(group)
+            group = []
+        group.append(message)
+        group_topic_id = topic_id
+
+    if group:
+        if not control.is_running:
+            return False
+        await flush(group)
+    return control.is_running
+
+
+async def fetch_message_window(
+    bot: Client, app: Client, chat_id: int, message_ids: list, topic_client: Client = None
+) -> dict:
+    """
+    Fetch up to PREFETCH_WINDOW messages in one request, mapped by message ID.
+
+    FloodWaits are waited out. Other errors are raised so the task stops at
+    this window instead of skipping it. With topic_client, forum topics of
+    the messages are resolved and created with that account instead of app,
+    e.g. the task owner's when a worker account fetched them.
+    """
+    messages = await bot.floodwait_handler(app.get_messages, chat_id, message_ids)
+    window = {}
+    for message in messages:
+        if message:
+            message.topic_client = topic_client
+            window[message.id] = message
+    return window
+
+
+def is_message_allowed(message, allowed_media: frozenset) -> bool:
+    """Check if a fetched message should be forwarded"""
+    if not message or message.empty or message.sticker or message.service:
+        return False
+    if message.media and message.media.value not in allowed_media:
+        return False
+    if message.text and "text" not in allowed_media:
+        return False
+    return True
 
 
 async def complete_or_pause_task(bot: Client, task_id: int, user_id: int, processed_count: int):
@@ -361,27 +773,12 @@ async def complete_or_pause_task(bot: Client, task_id: int, user_id: int, proces
 
 
 async def process_message_item(
-    bot: Client, app: Client, chat_id: int, message_id: int, user_id: int, notion_enabled: bool
+    bot: Client, app: Client, message, user_id: int, notion_enabled: bool
 ) -> bool:
-    """Fetch and forward a single message, handling media limitations"""
-    try:
-        message = await app.get_messages(chat_id, message_id)
-    except Exception as e:
-        logger.debug(f"Could not get message {message_id}: {e}")
-        return False
-
-    if not message or message.empty or message.sticker or message.service:
-        return False
-
-    allowed_media = await get_media_type()
-    if message.media and message.media.value not in allowed_media:
-        return False
-    if message.text and "text" not in allowed_media:
-        return False
-
+    """Forward a single prefetched message"""
     download_id = random.randint(100000, 999999)
     message.download_id = download_id
-    message.index = f"{message_id}"
+    message.index = f"{message.id}"
 
     Config.TRANSFERS[download_id] = {
         "user_id": user_id,
@@ -411,6 +808,7 @@ async def show_active_task(bot: Client, chat_id: int, user_id: int, query = None
             await bot.send_message(chat_id, text, reply_markup=markup)
         return
 
+    task = with_live_progress(task)
     text = format_task_text(task)
     markup = make_task_markup(task)
     if query:
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import random
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 import datetime
@@ -20,6 +21,99 @@ async def asyncio_command_exec(command_to_exec):
 async def sync_to_async(func, *args, **kwargs):
     return await asyncio.to_thread(func, *args, **kwargs)
 
+# Parsed probes of recent files, keyed by (path, size, mtime)
+PROBE_CACHE_SIZE = 64
+_probe_cache: "OrderedDict[tuple, asyncio.Future]" = OrderedDict()
+
+
+class MediaInfo:
+    """Parsed ffprobe output of a media file"""
+
+    def __init__(self, probe: dict):
+        self.streams = probe.get("streams", [])
+        self.format = probe.get("format", {})
+        self.width = 0
+        self.height = 0
+        self.duration = 0
+
+        for stream in self.streams:
+            if stream["codec_type"] == "video":
+                self.width = stream["width"]
+                self.height = stream["height"]
+                duration = stream.get("duration", 0)
+                if not duration:
+                    duration = self.format.get("duration", 0)
+                self.duration = int(str(duration).split(".")[0])
+                break
+
+        self.languages = self._get_languages()
+
+    def _get_languages(self):
+        media_languages = {"video": [], "audio": [], "subtitles": []}
+        audio_index, subtitle_index, video_index = 0, 0, 0
+
+        for stream in self.streams:
+            if "tags" in stream and "language" in stream["tags"]:
+                # index be the total len of audio steams
+                language_info = {
+                    "index": stream["index"],
+                    "language": stream["tags"]["language"],
+                }
+                if stream["codec_type"] == "video":
+                    language_info["index"] = video_index
+                    media_languages["video"].append(language_info)
+                    video_index += 1
+                elif stream["codec_type"] == "audio":
+                    language_info["index"] = audio_index
+                    media_languages["audio"].append(language_info)
+                    audio_index += 1
+                elif stream["codec_type"] == "subtitle":
+                    language_info["index"] = subtitle_index
+                    media_languages["subtitles"].append(language_info)
+                    subtitle_index += 1
+        return media_languages
+
+
+async def _probe(file_path) -> MediaInfo:
+    try:
+        probe = await sync_to_async(ffmpeg.probe, file_path)
+    except ffmpeg.Error as e:
+        logger.error(e.stderr.decode() if e.stderr else str(e))
+        raise e
+    return MediaInfo(probe)
+
+
+async def probe_media(file_path) -> MediaInfo:
+    """Probe a file once and reuse the result until the file changes.
+
+    Concurrent callers for the same file share a single ffprobe run.
+
+    Args:
+        file_path: The path to the media file.
+
+    Returns:
+        MediaInfo of the file.
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+    future = _probe_cache.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_probe(file_path))
+        _probe_cache[key] = future
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    else:
+        _probe_cache.move_to_end(key)
+
+    try:
+        return await asyncio.shield(future)
+    except Exception:
+        # Don't remember failures, the next call probes again
+        _probe_cache.pop(key, None)
+        raise
+
+
 async def get_video_details(video_path):
     """Gets video information like width, height, and duration.
 
@@ -27,50 +121,38 @@ async def get_video_details(video_path):
         video_path: The path to the video file.
 
     Returns:
-        A dictionary containing the video information.
+        A tuple of width, height and duration in seconds.
     """
+    info = await probe_media(video_path)
+    return info.width, info.height, info.duration
 
-    try:
-        #video_info = ffmpeg.probe(video_path)
-        video_info = await sync_to_async(ffmpeg.probe, video_path)
-    except ffmpeg.Error as e:
-        logger.error(e.stderr.decode() if e.stderr else str(e))
-        raise e
-    for stream in video_info["streams"]:
-        if stream["codec_type"] == "video":
-            width = stream["width"]
-            height = stream["height"]
-            duration = stream.get("duration", 0)
-            if not duration:
-                duration = video_info.get("format", {}).get("duration", 0)
-
-            duration = str(duration)
-            return width, height, int(duration.split(".")[0])
-    return 0, 0, 0
-
-async def create_thumbnail(inputpath):
-    """Creates a thumbnail for a video file."""
+async def create_thumbnail(inputpath, outputpath=None):
+    """Creates a thumbnail for a video file.
+
+    Seeks on the input and decodes keyframes only, so a single frame is read
+    near the requested position instead of decoding up to it.
+    """
     _, __, duration = await get_video_details(inputpath)
-    if not duration:
-        duration = 5
-    random_duration = random.randint(1, duration)
-    # make timestamp HH:MM:SS
-    random_duration = str(datetime.timedelta(seconds=random_duration))
+    # A tenth into the video skips intros and black frames
+    timestamp = str(datetime.timedelta(seconds=max(duration // 10, 1)))
 
     def random_string(length):
         return "".join(random.choices("0123456789", k=length))
 
-    outputpath = f"downloads/{random_string(10)}.jpg"
+    outputpath = outputpath or f"downloads/{random_string(10)}.jpg"
     try:
         await asyncio_command_exec(
             [
                 "ffmpeg",
+                "-skip_frame",
+                "nokey",
                 "-ss",
-                random_duration,
+                timestamp,
                 "-i",
                 inputpath,
                 "-vframes",
                 "1",
+                "-y",
                 outputpath,
             ]
         )
@@ -96,35 +178,8 @@ async def extract_media_languages(input_path):
                'audio': [{'index': 1, 'language': 'eng'}, {'index': 2, 'language': 'fra'}],
                'subtitles': [{'index': 3, 'language': 'eng'}]}
     """
-    try:
-        video_info = await sync_to_async(ffmpeg.probe, input_path)
-    except ffmpeg.errors as e:
-        logger.error(e.stderr.decode() if e.stderr else str(e))
-        raise e
-
-    media_languages = {"video": [], "audio": [], "subtitles": []}
-    audio_index, subtitle_index, video_index = 0, 0, 0
-
-    for stream in video_info["streams"]:
-        if "tags" in stream and "language" in stream["tags"]:
-            # index be the total len of audio steams
-            language_info = {
-                "index": stream["index"],
-                "language": stream["tags"]["language"],
-            }
-            if stream["codec_type"] == "video":
-                language_info["index"] = video_index
-                media_languages["video"].append(language_info)
-                video_index += 1
-            elif stream["codec_type"] == "audio":
-                language_info["index"] = audio_index
-                media_languages["audio"].append(language_info)
-                audio_index += 1
-            elif stream["codec_type"] == "subtitle":
-                language_info["index"] = subtitle_index
-                media_languages["subtitles"].append(language_info)
-                subtitle_index += 1
-    return media_languages
+    info = await probe_media(input_path)
+    return info.languages
 
 
 async def change_subtitle_tag_title(
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: forum_topics.py
+Author: Maria Kevin
+Description: Persistent forum topic directory with single-flight topic creation
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from pyrogram import Client
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+
+async def get_topics_by_chat_id(client: Client, chat_id: int):
+    """Get all topics from a chat and return a dict mapping topic names to topic IDs"""
+    topics: Dict[str, int] = {}
+    try:
+        async for topic in client.get_forum_topics(chat_id):
+            topics[topic.title] = topic.id
+    except Exception as e:
+        logger.error(f"Error getting topics from chat {chat_id}: {e}")
+
+    return topics
+
+
+class TopicDirectory:
+    """Process-wide chat -> {topic name: topic id} directory, backed by MongoDB
+
+    A chat's topics are listed from Telegram only when nothing is stored for
+    it yet, or when a topic name is missing and may have been created outside
+    the bot. Creation is single-flight per chat and name, so concurrent
+    workers wait for one topic instead of each creating their own.
+    """
+
+    def __init__(self):
+        self.topics: Dict[int, Dict[str, int]] = {}
+        self.locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+        self.load_locks: Dict[int, asyncio.Lock] = {}
+        self.stale = set()
+
+    async def get_topic_id(self, client: Client, chat_id: int, title: str) -> Optional[int]:
+        """
+        Get the ID of a topic by name, creating it if it doesn't exist.
+
+        Args:
+            client: Client allowed to list and create topics in the chat
+            chat_id: Forum chat ID
+            title: Topic name
+
+        Returns:
+            Topic ID, None if the topic couldn't be created
+        """
+        topics = await self._load(client, chat_id)
+        if title in topics:
+            return topics[title]
+
+        lock = self.locks.setdefault((chat_id, title), asyncio.Lock())
+        async with lock:
+            topics = self.topics.get(chat_id, {})
+            if title in topics:
+                return topics[title]
+
+            # The topic may have been created outside the bot since the last listing
+            await self.refresh(client, chat_id)
+            topics = self.topics[chat_id]
+            if title in topics:
+                return topics[title]
+
+            try:
+                topic = await client.create_forum_topic(chat_id=chat_id, title=title)
+            except Exception as e:
+                logger.error(f"Error creating topic '{title}': {e}")
+                return None
+
+            logger.info(f"Created new topic '{title}' with ID {topic.id}")
+            self.topics.setdefault(chat_id, {})[title] = topic.id
+            await db.forum_topics.save_topic(chat_id, title, topic.id)
+            return topic.id
+
+    async def _load(self, client: Client, chat_id: int) -> Dict[str, int]:
+        """Get the directory of a chat from memory, MongoDB or Telegram, in that order"""
+        if chat_id in self.topics:
+            return self.topics[chat_id]
+
+        async with self.load_locks.setdefault(chat_id, asyncio.Lock()):
+            if chat_id not in self.topics:
+                topics = {} if chat_id in self.stale else await db.forum_topics.get_topics(chat_id)
+                if topics:
+                    self.topics[chat_id] = topics
+                else:
+                    await self.refresh(client, chat_id)
+                self.stale.discard(chat_id)
+        return self.topics[chat_id]
+
+    async def refresh(self, client: Client, chat_id: int):
+        """List the chat's topics from Telegram and store them"""
+        topics = await get_topics_by_chat_id(client, chat_id)
+        if not topics:
+            # Listing failed or the chat has no topics yet, keep what we know
+            self.topics.setdefault(chat_id, {})
+            return
+        self.topics[chat_id] = topics
+        await db.forum_topics.replace_topics(chat_id, topics)
+
+    def forget(self, chat_id: int):
+        """Re-list a chat's topics from Telegram on next use, e.g. after a send into it failed"""
+        self.topics.pop(chat_id, None)
+        self.stale.add(chat_id)
+
+
+topic_directory = TopicDirectory()
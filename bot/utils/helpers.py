@@ -1,3 +1,4 @@
+import asyncio
 import functools
 import logging
 
@@ -6,6 +7,7 @@ import math
 import os
 import random
 import time
+from collections import OrderedDict
 
 from pyrogram import Client, StopTransmission, types
 
@@ -15,20 +17,59 @@ from bot.utils.ffmpeg import create_thumbnail
 from database import db
 
 
-async def get_thumbnail(file_path):
-    """Create thumbnail only for video files"""
-    # Check if file is a video by extension
-    video_extensions = ['.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv', '.webm', '.m4v', '.mpg', '.mpeg']
-    
-    if not any(file_path.lower().endswith(ext) for ext in video_extensions):
-        # Not a video file, skip thumbnail creation
-        return None
-    
-    # Only create thumbnail for video files
-    thumbnail = await create_thumbnail(file_path)
+# file_unique_id -> thumbnail on disk, shared by every transfer of the same file
+THUMBNAIL_DIR = "downloads/thumbs"
+THUMBNAIL_CACHE_SIZE = 500
+_thumbnail_cache: "OrderedDict[str, str]" = OrderedDict()
+
+VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv', '.webm', '.m4v', '.mpg', '.mpeg']
+
+
+async def get_thumbnail(file_path, message: types.Message = None, app: Client = None):
+    """Get a thumbnail for an upload, cheapest source first.
+
+    1. A thumbnail cached for the same file_unique_id
+    2. The source message's own thumbnail, downloaded through the user client
+    3. A keyframe grabbed with ffmpeg, for video files only
+
+    The returned file belongs to the cache and must not be deleted by the caller.
+    """
+    media = message and (message.video or message.document or message.audio)
+    key = getattr(media, "file_unique_id", None)
+
+    cached = _thumbnail_cache.get(key) if key else None
+    if cached and os.path.exists(cached):
+        _thumbnail_cache.move_to_end(key)
+        return cached
+
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    output_path = os.path.join(
+        THUMBNAIL_DIR, f"{key or os.path.basename(file_path)}.jpg"
+    )
+
+    thumbnail = None
+    if app and getattr(media, "thumbs", None):
+        thumb = max(media.thumbs, key=lambda t: t.file_size or 0)
+        thumbnail = await download_thumbnail(app, thumb.file_id, output_path)
+
+    if not thumbnail and any(file_path.lower().endswith(ext) for ext in VIDEO_EXTENSIONS):
+        thumbnail = await create_thumbnail(file_path, output_path)
+
+    if thumbnail and key:
+        _thumbnail_cache[key] = thumbnail
+        while len(_thumbnail_cache) > THUMBNAIL_CACHE_SIZE:
+            _, old = _thumbnail_cache.popitem(last=False)
+            if old != thumbnail and os.path.exists(old):
+                os.remove(old)
     return thumbnail
 
 
+def release_thumbnail(thumbnail):
+    """Delete a thumbnail after upload, unless it's kept in the cache"""
+    if thumbnail and thumbnail not in _thumbnail_cache.values() and os.path.exists(thumbnail):
+        os.remove(thumbnail)
+
+
 async def set_commands(app: Client):
     commands = [
         types.BotCommand("start", "🚀 Get started with the bot"),
@@ -47,9 +88,28 @@ async def set_commands(app: Client):
     await app.set_bot_commands(commands, scope=types.BotCommandScopeAllPrivateChats())
 
 
-async def get_admins():
-    config = await db.config.get_config("ADMINS")
-    return config["value"]
+# Admin list kept in memory, refreshed on writes and after ADMINS_CACHE_TTL seconds
+ADMINS_CACHE_TTL = 300
+_admins_cache = {"admins": [], "ids": frozenset(), "loaded_at": None}
+
+
+def _set_admins_cache(admins: list):
+    _admins_cache["admins"] = list(admins)
+    _admins_cache["ids"] = frozenset(admins)
+    _admins_cache["loaded_at"] = time.monotonic()
+
+
+async def get_admins(refresh=False):
+    loaded_at = _admins_cache["loaded_at"]
+    if refresh or loaded_at is None or time.monotonic() - loaded_at > ADMINS_CACHE_TTL:
+        config = await db.config.get_config("ADMINS")
+        _set_admins_cache(config["value"] if config else [])
+    return _admins_cache["admins"]
+
+
+async def is_admin(user_id) -> bool:
+    await get_admins()
+    return user_id in _admins_cache["ids"]
 
 
 async def add_admin(user_id):
@@ -59,11 +119,14 @@ async def add_admin(user_id):
         if user_id not in admins:
             admins.append(user_id)
             await db.config.update_config("ADMINS", admins)
+            _set_admins_cache(admins)
             return True
     else:
         await db.config.add_config("ADMINS", [user_id])
+        _set_admins_cache([user_id])
         return True
 
+    _set_admins_cache(admins)
     return False
 
 
@@ -74,7 +137,9 @@ async def remove_admin(user_id):
         if user_id in admins:
             admins.remove(user_id)
             await db.config.update_config("ADMINS", admins)
+            _set_admins_cache(admins)
             return True
+        _set_admins_cache(admins)
     return False
 
 
@@ -99,9 +164,13 @@ async def add_user(bot: Client, user: types.User):
     return True
 
 
-async def download_thumbnail(app: Client, thumbnail_id: int):
+async def download_thumbnail(app: Client, thumbnail_id: str, file_name: str = None):
+    thumbnail = None
     try:
-        thumbnail = await app.download_media(thumbnail_id)
+        if file_name:
+            thumbnail = await app.download_media(thumbnail_id, file_name=file_name)
+        else:
+            thumbnail = await app.download_media(thumbnail_id)
     except Exception as e:
         logger.error(f"Error downloading thumbnail: {e}")
         try:
@@ -112,16 +181,43 @@ async def download_thumbnail(app: Client, thumbnail_id: int):
     return thumbnail
 
 
-async def progress_for_pyrogram(
-    current, total, start, file_message, edit_func, download_id, mode="Uploading"
-):
-    if is_transfer_cancelled(download_id):
-        raise StopTransmission
-    # if total is less than 50mb. then do nothing
-    if total < 50000000:
-        return
+class EditBudget:
+    """Minimum spacing between progress edits in a chat, shared by all its transfers"""
+
+    def __init__(self, interval: float, prune_every: float = 600):
+        self.interval = interval
+        self.prune_every = prune_every
+        self.next_prune = 0
+        self.next_edit = {}
+
+    def try_acquire(self, chat_id, now: float) -> bool:
+        if now >= self.next_prune:
+            # Forget chats whose spacing has long passed
+            self.next_edit = {chat: at for chat, at in self.next_edit.items() if at > now}
+            self.next_prune = now + self.prune_every
+        if now < self.next_edit.get(chat_id, 0):
+            return False
+        self.next_edit[chat_id] = now + self.interval
+        return True
+
+
+edit_budget = EditBudget(Config.PROGRESS_CHAT_INTERVAL)
+
+
+class ProgressReporter:
+    """Progress callback of a single transfer
+
+    Each callback only records the latest value. The progress message is edited
+    in the background at most every Config.PROGRESS_INTERVAL seconds, and only
+    when the chat's edit budget allows it; values arriving meanwhile are
+    coalesced into the next edit.
+
+    The final value is always shown, with one trailing edit if it arrives while
+    another edit is still in flight.
+
+    Pass ``reporter.update`` as the pyrogram progress callback.
+    """
 
-    file_message: types.Message = file_message
     progress_data = [
         ("■", "□"),
         ("★", "❍"),
@@ -131,30 +227,53 @@ async def progress_for_pyrogram(
         ("✪", "❍"),
         ("★", "✩"),
     ]
-    progress_bar = random.choice(progress_data)
-    now = time.time()
-    diff = now - start
-    a, b = progress_bar
 
-    if round(diff % 25.00) == 0 or current == total:
-        percentage = current * 100 / total
-        speed = current / diff
-        elapsed_time = round(diff) * 1000
-        time_to_completion = round((total - current) / speed) * 1000
-        estimated_total_time = time_to_completion
+    def __init__(self, progress_msg: types.Message, download_id, mode="Uploading", min_size=50000000):
+        self.progress_msg = progress_msg
+        self.download_id = download_id
+        self.mode = mode
+        # small files finish before a progress edit would be useful
+        self.min_size = min_size
+        self.start = time.monotonic()
+        self.next_edit = 0
+        self.latest = None
+        self.task = None
+        self.bar = random.choice(self.progress_data)
+
+    async def update(self, current, total, *args):
+        if is_transfer_cancelled(self.download_id):
+            raise StopTransmission
+        if total < self.min_size:
+            return
+
+        self.latest = (current, total)
+        if self.task and not self.task.done():
+            return
+
+        now = time.monotonic()
+        if current != total:
+            if now < self.next_edit:
+                return
+            if not edit_budget.try_acquire(self.progress_msg.chat.id, now):
+                return
 
-        elapsed_time = TimeFormatter(milliseconds=elapsed_time)
-        estimated_total_time = TimeFormatter(milliseconds=estimated_total_time)
+        self.next_edit = now + Config.PROGRESS_INTERVAL
+        self.task = asyncio.create_task(self._edit())
 
-        progress = "{0}{1}\n".format(
-            "".join([a for _ in range(math.floor(percentage / (100 / 15)))]),
-            "".join([b for _ in range(15 - math.floor(percentage / (100 / 15)))]),
-        ).strip()
+    def format(self, current, total) -> str:
+        diff = max(time.monotonic() - self.start, 0.001)
+        a, b = self.bar
 
-        tmp = Script.PROGRESS_MESSAGE
+        percentage = current * 100 / total
+        speed = current / diff
+        time_to_completion = round((total - current) / speed) * 1000 if speed else 0
+        estimated_total_time = TimeFormatter(milliseconds=time_to_completion)
+
+        filled = math.floor(percentage / (100 / 15))
+        progress = "{0}{1}\n".format(a * filled, b * (15 - filled)).strip()
 
-        tmp = tmp.format(
-            mode=mode,
+        return Script.PROGRESS_MESSAGE.format(
+            mode=self.mode,
             percentage=round(percentage, 2),
             progress=progress,
             speed=humanbytes(speed),
@@ -163,14 +282,24 @@ async def progress_for_pyrogram(
             total=humanbytes(total),
         )
 
+    async def _edit(self):
+        sent = None
+        while self.latest != sent:
+            current, total = sent = self.latest
+            await self._send(current, total)
+            if self.latest[0] != self.latest[1]:
+                # Later values wait for the next callback and its spacing
+                return
+
+    async def _send(self, current, total):
         try:
-            await edit_func(
-                tmp,
+            await self.progress_msg.edit(
+                self.format(current, total),
                 reply_markup=types.InlineKeyboardMarkup(
                     [
                         [
                             types.InlineKeyboardButton(
-                                "Cancel", callback_data=f"cancel {download_id}"
+                                "Cancel", callback_data=f"cancel {self.download_id}"
                             )
                         ]
                     ]
@@ -182,12 +311,19 @@ async def progress_for_pyrogram(
 
 
 async def get_user_client(user_id) -> Client:
+    client = Config.USER_CLIENTS.get(user_id)
+    if client:
+        return client
+
+    # Fall back to the session stored for the user
     user = await db.users.read(user_id)
     if not user:
         return
 
     session_id = user["session"].get("id")
     client = Config.CLIENTS.get(session_id)
+    if client:
+        Config.USER_CLIENTS[user_id] = client
     return client
 
 
@@ -248,9 +384,8 @@ def check_admin(func):
     @functools.wraps(func)
     async def wrapper(client: Client, message):
         chat_id = getattr(message.from_user, "id", None)
-        admins = await get_admins()
 
-        if chat_id not in admins:
+        if not await is_admin(chat_id):
             return await message.reply_text("You are not allowed to use this command.")
         return await func(client, message)
 
@@ -4,19 +4,38 @@ from bot.config import Config
 
 name = "media_type"
 
-async def get_media_type():
-    r = await db.config.get_or_create_config(name, list(Config.ALL_MEDIA_TYPES.keys()))
-    return r["value"]
+# In-process copy of the allow-list, kept in sync by the write helpers below
+_cache: frozenset | None = None
+
+async def get_media_type() -> frozenset:
+    global _cache
+    if _cache is None:
+        r = await db.config.get_or_create_config(name, list(Config.ALL_MEDIA_TYPES.keys()))
+        _cache = frozenset(r["value"])
+    return _cache
 
 async def add_media_type(media_type: MessageMediaType | str):
+    global _cache
     if isinstance(media_type, MessageMediaType):
         media_type = media_type.value
-    await db.config.col.update_one({"name": name}, {"$push": {"value": media_type}})
+    await db.config.col.update_one({"name": name}, {"$addToSet": {"value": media_type}})
+    _cache = (await get_media_type()) | {media_type}
     return True
 
 async def remove_media_type(media_type: MessageMediaType | str):
+    global _cache
     if isinstance(media_type, MessageMediaType):
         media_type = media_type.value
     await db.config.col.update_one({"name": name}, {"$pull": {"value": media_type}})
+    _cache = (await get_media_type()) - {media_type}
     return True
 
+async def set_media_types(media_types: list):
+    global _cache
+    await db.config.col.update_one(
+        {"name": name},
+        {"$set": {"value": list(media_types)}},
+        upsert=True
+    )
+    _cache = frozenset(media_types)
+    return True
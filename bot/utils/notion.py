@@ -6,18 +6,25 @@ Author: Maria Kevin
 Description: Clean wrapper for Notion file upload API
 """
 
+import asyncio
 import logging
 import mimetypes
 import os
+import tempfile
 from typing import TYPE_CHECKING, List, Optional
 
 logger = logging.getLogger(__name__)
 
-import requests
+from aiohttp import FormData
 from pydantic import BaseModel
 
 from bot.config import Config
-from bot.utils.archive_handler import cleanup_extracted_files, extract_archive
+from bot.utils.archive_handler import (
+    ExtractedFile,
+    cleanup_extracted_files,
+    iter_archive_members,
+)
+from bot.utils.notion_client import NotionAPIError, notion_client
 
 if TYPE_CHECKING:
     from pyrogram import types
@@ -42,7 +49,7 @@ class NotionUploadError(Exception):
 
 
 
-def upload_file_to_notion(
+async def upload_file_to_notion(
     file_path: str,
     notion_token: Optional[str] = None
 ) -> NotionFileUploadResult:
@@ -75,35 +82,39 @@ def upload_file_to_notion(
     if not mime_type:
         mime_type = "application/octet-stream"
     
-    # Common headers for all requests
-    auth_headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28"
-    }
-    
     try:
         # Step 1: Create upload object with filename and content_type
-        create_response = requests.post(
-            "https://api.notion.com/v1/file_uploads",
-            headers={**auth_headers, "Content-Type": "application/json"},
+        create_response = await notion_client.post(
+            "file_uploads",
+            token=token,
             json={
                 "filename": os.path.basename(file_path),
                 "content_type": mime_type
             }
         )
-        create_response.raise_for_status()
         
         # Parse response with Pydantic
-        upload_info = NotionUploadResponse(**create_response.json())
+        upload_info = NotionUploadResponse(**create_response)
         
         # Step 2: Upload file to the upload URL (requires auth headers)
-        with open(file_path, "rb") as f:
-            upload_response = requests.post(
-                upload_info.upload_url,
-                headers=auth_headers,
-                files={"file": (os.path.basename(file_path), f, mime_type)}
+        # aiohttp closes a file once it's sent, so every attempt opens its own
+        opened = []
+
+        def make_form():
+            f = open(file_path, "rb")
+            opened.append(f)
+            form = FormData()
+            form.add_field(
+                "file", f, filename=os.path.basename(file_path), content_type=mime_type
             )
-            upload_response.raise_for_status()
+            return form
+
+        try:
+            await notion_client.post(upload_info.upload_url, token=token, data=make_form)
+        finally:
+            # Attempts that failed before sending leave their file open
+            for f in opened:
+                f.close()
         
         # Return result with file_id
         return NotionFileUploadResult(
@@ -111,17 +122,14 @@ def upload_file_to_notion(
             file_name=os.path.basename(file_path)
         )
         
-    except requests.RequestException as e:
+    except NotionAPIError as e:
         error_msg = f"Upload failed: {str(e)}"
-        if hasattr(e, "response") and e.response is not None:
-            try:
-                error_msg += f"\nResponse: {e.response.text}"
-            except Exception:
-                pass
+        if e.response_text:
+            error_msg += f"\nResponse: {e.response_text}"
         raise NotionUploadError(error_msg) from e
 
 
-def upload_message_to_notion(
+async def upload_message_to_notion(
     message: "types.Message",
     file_path: Optional[str] = None,
     notion_token: Optional[str] = None
@@ -145,7 +153,7 @@ def upload_message_to_notion(
         return None
     
     # Upload to Notion
-    return upload_file_to_notion(file_path, notion_token)
+    return await upload_file_to_notion(file_path, notion_token)
 
 
 class ArchiveUploadResult(BaseModel):
@@ -157,7 +165,7 @@ class ArchiveUploadResult(BaseModel):
     success: bool = True
 
 
-def upload_archive_to_notion(
+async def upload_archive_to_notion(
     archive_path: str,
     notion_token: Optional[str] = None,
     max_files: int = 100,
@@ -180,37 +188,61 @@ def upload_archive_to_notion(
         ArchiveHandlerError: If extraction fails
         FileNotFoundError: If archive doesn't exist
     """
-    extract_dir = None
-    
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"Archive not found: {archive_path}")
+
+    extract_dir = tempfile.mkdtemp(prefix="archive_extract_")
+    members = iter_archive_members(archive_path, extract_dir, max_files, max_total_size)
+
+    # Upload files concurrently, the rate limiter in notion_client keeps us under Notion's limit.
+    # A slot is taken before a member is extracted, so at most this many files are on disk.
+    semaphore = asyncio.Semaphore(max(Config.NOTION_UPLOAD_CONCURRENCY, 1))
+
+    async def upload_member(idx: int, extracted_file: ExtractedFile) -> Optional[NotionFileUploadResult]:
+        try:
+            logger.info(f"  [{idx}] Uploading: {extracted_file.relative_path}")
+            return await upload_file_to_notion(extracted_file.path, notion_token)
+        except Exception as e:
+            logger.warning(f"  Failed to upload {extracted_file.relative_path}: {e}")
+            # Continue with other files
+            return None
+        finally:
+            extracted_file.cleanup()
+            semaphore.release()
+
+    extracted_files = []
+    tasks = []
+    # The generator runs in a worker thread, one step at a time
+    extracting: Optional[asyncio.Future] = None
+
     try:
-        # Extract archive
-        logger.info(f"Extracting archive: {os.path.basename(archive_path)}")
-        extracted_files = extract_archive(
-            archive_path
-        )
-        
+        logger.info(f"Extracting and uploading archive: {os.path.basename(archive_path)}")
+
+        while True:
+            await semaphore.acquire()
+            # Shielded, so a cancellation doesn't leave the thread running unawaited
+            extracting = asyncio.ensure_future(asyncio.to_thread(next, members, None))
+            extracted_file = await asyncio.shield(extracting)
+            if extracted_file is None:
+                semaphore.release()
+                break
+
+            extracted_files.append(extracted_file)
+            tasks.append(asyncio.create_task(upload_member(len(extracted_files), extracted_file)))
+
         if not extracted_files:
             raise NotionUploadError("Archive is empty or contains no files")
-        
-        # Get extraction directory from first file
-        extract_dir = os.path.dirname(extracted_files[0].path)
-        
-        logger.info(f"Uploading {len(extracted_files)} files to Notion...")
-        
-        # Upload each file
+
+        # gather keeps the archive order, so ids and names stay aligned
+        results = await asyncio.gather(*tasks)
+
         file_ids = []
         file_names = []
-        
-        for idx, extracted_file in enumerate(extracted_files, 1):
-            try:
-                logger.info(f"  [{idx}/{len(extracted_files)}] Uploading: {extracted_file.relative_path}")
-                result = upload_file_to_notion(extracted_file.path, notion_token)
+
+        for extracted_file, result in zip(extracted_files, results):
+            if result:
                 file_ids.append(result.file_id)
                 file_names.append(extracted_file.relative_path)
-            except Exception as e:
-                logger.warning(f"  Failed to upload {extracted_file.relative_path}: {e}")
-                # Continue with other files
-                continue
         
         if not file_ids:
             raise NotionUploadError("Failed to upload any files from archive")
@@ -225,7 +257,12 @@ def upload_archive_to_notion(
         )
     
     finally:
-        # Clean up extracted files
-        if extract_dir:
-            cleanup_extracted_files(extract_dir)
-
+        # Stop pending uploads before removing the files they read
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # The generator can't be closed, nor its files removed, while a step is still extracting
+        if extracting is not None:
+            await asyncio.gather(extracting, return_exceptions=True)
+        members.close()
+        cleanup_extracted_files(extract_dir)
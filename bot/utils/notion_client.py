@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: notion_client.py
+Author: Maria Kevin
+Description: Async Notion HTTP client sharing one keep-alive connection pool
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+from aiohttp import (
+    ClientConnectorError,
+    ClientError,
+    ClientSession,
+    ClientTimeout,
+    FormData,
+    TCPConnector,
+)
+
+from bot.config import Config
+
+logger = logging.getLogger(__name__)
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+# Statuses worth retrying: rate limited, conflicts and transient server errors
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+# Statuses Notion returns before doing any work, safe to retry for every request
+SAFE_RETRY_STATUSES = {409, 429}
+
+
+class NotionAPIError(Exception):
+    """Raised when a Notion API request fails"""
+
+    def __init__(self, message: str, status: Optional[int] = None, response_text: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.response_text = response_text
+
+
+class TokenBucket:
+    """Async token bucket that hands out request slots in FIFO order"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait for a free slot"""
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds: float):
+        """Hold every request for the given time, e.g. after a 429"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        # Refill from the end of the pause, not across it
+        self.updated = self.paused_until
+
+
+class NotionClient:
+    """Async client for the Notion API backed by a single aiohttp session"""
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: int = 60,
+        rate_limit: float = 3,
+        max_retries: int = 5,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_limit, max(int(rate_limit), 1))
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a rate limit slot"""
+        return self.bucket.waiting
+
+    def _get_session(self) -> ClientSession:
+        """Create the shared session on first use, inside the running loop"""
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=ClientTimeout(total=None, connect=10, sock_read=self.timeout),
+            )
+        return self._session
+
+    @staticmethod
+    def is_idempotent(method: str, url: str) -> bool:
+        """Whether repeating the request can't create a duplicate page or block"""
+        path = url.rstrip("/")
+        if method == "POST" and path.endswith("/pages"):
+            return False
+        if method == "PATCH" and path.endswith("/children"):
+            return False
+        return True
+
+    @staticmethod
+    def get_headers(token: Optional[str] = None) -> Dict[str, str]:
+        """Authorization headers for a Notion integration token"""
+        return {
+            "Authorization": f"Bearer {token or Config.NOTION_TOKEN}",
+            "Notion-Version": NOTION_VERSION,
+        }
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        token: Optional[str] = None,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[FormData, Callable[[], FormData]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send a request to the Notion API, within the integration's rate limit.
+
+        Rate limited requests are retried after their Retry-After delay, other
+        transient failures with exponential backoff. Requests that create pages
+        or append blocks are only retried when Notion surely didn't apply them
+        (409, 429 or no connection), since a 5xx or timeout may hide a success.
+
+        Args:
+            method: HTTP method
+            url: Full URL or path relative to the Notion API root
+            token: Notion integration token (defaults to Config.NOTION_TOKEN)
+            json: JSON body
+            data: Multipart form body, or a callable building a fresh one for each attempt
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            NotionAPIError: If the request fails or Notion returns an error status
+        """
+        if not url.startswith("http"):
+            url = f"{NOTION_API_URL}/{url.lstrip('/')}"
+        retry_statuses = RETRY_STATUSES if self.is_idempotent(method, url) else SAFE_RETRY_STATUSES
+
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            delay = min(2 ** attempt, 30)
+
+            try:
+                body = data() if callable(data) else data
+                async with self._get_session().request(
+                    method, url, headers=self.get_headers(token), json=json, data=body
+                ) as response:
+                    text = await response.text()
+                    if response.status < 400:
+                        return await response.json(content_type=None) if text else {}
+
+                    error = NotionAPIError(
+                        f"{response.status} {response.reason} for url: {url}",
+                        status=response.status,
+                        response_text=text,
+                    )
+                    if response.status == 429:
+                        delay = float(response.headers.get("Retry-After", delay))
+                        self.bucket.pause(delay)
+                    if response.status not in retry_statuses:
+                        raise error
+            except (ClientError, asyncio.TimeoutError) as e:
+                error = NotionAPIError(f"{type(e).__name__}: {e} for url: {url}")
+                error.__cause__ = e
+                if retry_statuses is SAFE_RETRY_STATUSES and not isinstance(e, ClientConnectorError):
+                    raise error
+
+            if attempt < self.max_retries:
+                logger.warning(f"Notion request failed ({error}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+        raise error
+
+    async def post(self, url: str, **kwargs) -> Dict[str, Any]:
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> Dict[str, Any]:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+
+notion_client = NotionClient(
+    pool_size=Config.NOTION_POOL_SIZE,
+    timeout=Config.NOTION_TIMEOUT,
+    rate_limit=Config.NOTION_RATE_LIMIT,
+    max_retries=Config.NOTION_MAX_RETRIES,
+)
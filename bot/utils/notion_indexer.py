@@ -6,6 +6,10 @@ Author: Maria Kevin
 Description: Index Telegram messages to Notion pages
 """
 
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from bot.config import Config
 from bot.utils.formatters import (
     create_message_title,
     create_telegram_style_footer,
@@ -17,124 +21,311 @@ from database import db
 
 logger = logging.getLogger(__name__)
 
+# A failed message is retried after this many seconds, doubling up to RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 60
+RETRY_MAX_DELAY = 30 * 60
+# Unindexed messages are swept from the database this often, catching anything not queued
+SWEEP_INTERVAL = 30 * 60
 
-async def index_messages_to_notion():
-    """Index all unindexed messages to Notion"""
-    notion = NotionPageCreator()
-    messages = await db.messages.get_unindexed()
-    
-    for msg in messages:
-        try:
-            # Get or create channel page
-            channel_page_id = await db.notion_mapping.get_or_create(
-                chat_id=msg["chat_id"],
-                chat_name=msg["channel_name"] or f"Chat {msg['chat_id']}"
-            )
-            
-            if not channel_page_id:
-                # Create channel page
-                channel_page_id = notion.create_page(
-                    title=msg["channel_name"] or f"Chat {msg['chat_id']}"
-                )
-                await db.notion_mapping.save_mapping(
-                    chat_id=msg["chat_id"],
-                    chat_name=msg["channel_name"] or f"Chat {msg['chat_id']}",
-                    notion_page_id=channel_page_id
-                )
-            
-            # Get or create topic page if exists
-            parent_page_id = channel_page_id
-            if msg.get("topic_id"):
-                topic_page_id = await db.notion_mapping.get_or_create(
-                    chat_id=msg["chat_id"],
-                    chat_name=msg["channel_name"],
-                    topic_id=msg["topic_id"],
-                    topic_name=msg["topic_name"]
-                )
-                
-                if not topic_page_id:
-                    topic_page_id = notion.create_page(
-                        title=msg["topic_name"] or f"Topic {msg['topic_id']}",
-                        parent_page_id=channel_page_id
-                    )
-                    await db.notion_mapping.save_mapping(
-                        chat_id=msg["chat_id"],
-                        chat_name=msg["channel_name"],
-                        notion_page_id=topic_page_id,
-                        topic_id=msg["topic_id"],
-                        topic_name=msg["topic_name"]
-                    )
-                
-                parent_page_id = topic_page_id
-            
-            # Create Telegram-style message page
-            blocks = []
-            
-            # Add header with channel/topic info and message link
-            header = create_telegram_style_header(
-                message_id=msg["message_id"],
-                chat_id=msg["chat_id"],
-                channel_name=msg.get("channel_name"),
-                topic_name=msg.get("topic_name"),
-                topic_id=msg.get("topic_id"),
-                created_at=msg.get("created_at")
-            )
-            blocks.extend(notion.create_text_block(header))
-            blocks.append(notion.create_divider())
-            
-            # Check if this is an archive file with multiple extracted files
-            if msg.get("archive_files"):
-                # Handle archive files - create blocks for each extracted file
-                archive_data = msg["archive_files"]
-                blocks.extend(notion.create_archive_blocks(
-                    file_ids=archive_data["file_ids"],
-                    file_names=archive_data["file_names"],
-                    archive_name=archive_data["archive_name"]
-                ))
-            elif msg.get("media_url"):
-                # Regular single file - use appropriate block type
-                blocks.append(notion.create_media_block(
-                    file_id=msg["media_url"],
-                    mime_type=msg.get("mime_type", "file")
-                ))
-            
-            # Add caption/text as quote after media (Telegram style)
-            if msg.get("caption"):
-                blocks.extend(notion.create_quote_block(msg["caption"]))
-            
-            # Add footer with metadata
-            blocks.append(notion.create_divider())
-            footer = create_telegram_style_footer(
-                mime_type=msg.get("mime_type", "unknown"),
-                size=msg.get("size"),
-                media_title=msg.get("media_title")
-            )
-            blocks.extend(notion.create_callout_block(footer, "📊"))
-            
-            # Create smart title
-            title = create_message_title(
-                mime_type=msg.get("mime_type", "text"),
-                caption=msg.get("caption"),
-                media_title=msg.get("media_title")
+
+async def index_message_to_notion(msg: dict, notion: Optional[NotionPageCreator] = None) -> str:
+    """Create the Notion page of a single message document and mark it indexed"""
+    notion = notion or NotionPageCreator()
+
+    # Get or create channel page
+    channel_page_id = await notion_page_cache.get_channel_page(
+        notion,
+        chat_id=msg["chat_id"],
+        chat_name=msg["channel_name"] or f"Chat {msg['chat_id']}"
+    )
+
+    # Get or create topic page if exists
+    parent_page_id = channel_page_id
+    if msg.get("topic_id"):
+        parent_page_id = await notion_page_cache.get_topic_page(
+            notion,
+            chat_id=msg["chat_id"],
+            chat_name=msg["channel_name"],
+            topic_id=msg["topic_id"],
+            topic_name=msg["topic_name"],
+            channel_page_id=channel_page_id
+        )
+
+    # Create Telegram-style message page
+    blocks = []
+
+    # Add header with channel/topic info and message link
+    header = create_telegram_style_header(
+        message_id=msg["message_id"],
+        chat_id=msg["chat_id"],
+        channel_name=msg.get("channel_name"),
+        topic_name=msg.get("topic_name"),
+        topic_id=msg.get("topic_id"),
+        created_at=msg.get("created_at")
+    )
+    blocks.extend(notion.create_text_block(header))
+    blocks.append(notion.create_divider())
+
+    # Check if this is an archive file with multiple extracted files
+    if msg.get("archive_files"):
+        # Handle archive files - create blocks for each extracted file
+        archive_data = msg["archive_files"]
+        blocks.extend(notion.create_archive_blocks(
+            file_ids=archive_data["file_ids"],
+            file_names=archive_data["file_names"],
+            archive_name=archive_data["archive_name"]
+        ))
+    elif msg.get("media_url"):
+        # Regular single file - use appropriate block type
+        blocks.append(notion.create_media_block(
+            file_id=msg["media_url"],
+            mime_type=msg.get("mime_type", "file")
+        ))
+
+    # Add caption/text as quote after media (Telegram style)
+    if msg.get("caption"):
+        blocks.extend(notion.create_quote_block(msg["caption"]))
+
+    # Add footer with metadata
+    blocks.append(notion.create_divider())
+    footer = create_telegram_style_footer(
+        mime_type=msg.get("mime_type", "unknown"),
+        size=msg.get("size"),
+        media_title=msg.get("media_title")
+    )
+    blocks.extend(notion.create_callout_block(footer, "📊"))
+
+    # Create smart title
+    title = create_message_title(
+        mime_type=msg.get("mime_type", "text"),
+        caption=msg.get("caption"),
+        media_title=msg.get("media_title")
+    )
+
+    # Create the message page
+    message_page_id = await notion.create_page(
+        title=title,
+        parent_page_id=parent_page_id,
+        blocks=blocks
+    )
+
+    # Mark as indexed
+    await db.messages.mark_indexed(
+        _id=msg["_id"],
+        notion_page_id=message_page_id
+    )
+
+    # Only an upload attached to a page is worth reusing for later copies of the file
+    if msg.get("file_unique_id") and msg.get("media_url"):
+        await db.media_dedup.save_notion_file(
+            msg["file_unique_id"], msg["media_url"], msg.get("archive_files")
+        )
+
+    logger.info(f"Indexed message {msg['chat_id']}/{msg['message_id']}")
+    return message_page_id
+
+
+class NotionPageCache:
+    """Process-wide chat/topic -> Notion page ID cache
+
+    Lookups hit MongoDB only once per chat or topic. Creation is single-flight:
+    concurrent workers asking for the same missing page wait for the first one
+    instead of each creating a page.
+    """
+
+    def __init__(self):
+        self.pages: Dict[Tuple[int, Optional[int]], str] = {}
+        self.locks: Dict[Tuple[int, Optional[int]], asyncio.Lock] = {}
+        self.generation = 0
+
+    async def get_channel_page(self, notion: NotionPageCreator, chat_id: int, chat_name: str) -> str:
+        """Get the page of a chat, creating it under the parent page if needed"""
+
+        async def create():
+            page_id = await notion.create_page(title=chat_name)
+            await db.notion_mapping.save_mapping(
+                chat_id=chat_id,
+                chat_name=chat_name,
+                notion_page_id=page_id
             )
-            
-            # Create the message page
-            message_page_id = notion.create_page(
-                title=title,
-                parent_page_id=parent_page_id,
-                blocks=blocks
+            return page_id
+
+        return await self._get_or_create(
+            (chat_id, None),
+            lambda: db.notion_mapping.get_or_create(chat_id=chat_id, chat_name=chat_name),
+            create,
+        )
+
+    async def get_topic_page(
+        self,
+        notion: NotionPageCreator,
+        chat_id: int,
+        chat_name: str,
+        topic_id: int,
+        topic_name: Optional[str],
+        channel_page_id: str,
+    ) -> str:
+        """Get the page of a forum topic, creating it under the chat page if needed"""
+
+        async def create():
+            page_id = await notion.create_page(
+                title=topic_name or f"Topic {topic_id}",
+                parent_page_id=channel_page_id
             )
-            
-            # Mark as indexed
-            await db.messages.mark_indexed(
-                _id=msg["_id"],
-                notion_page_id=message_page_id
+            await db.notion_mapping.save_mapping(
+                chat_id=chat_id,
+                chat_name=chat_name,
+                notion_page_id=page_id,
+                topic_id=topic_id,
+                topic_name=topic_name
             )
-            
-            logger.info(f"Indexed message {msg['chat_id']}/{msg['message_id']}")
-            
-        except Exception as e:
-            logger.error(f"Failed to index message {msg['chat_id']}/{msg['message_id']}: {e}")
-            continue
-    
-    logger.info(f"Indexed {len(messages)} messages to Notion")
+            return page_id
+
+        return await self._get_or_create(
+            (chat_id, topic_id),
+            lambda: db.notion_mapping.get_or_create(
+                chat_id=chat_id,
+                chat_name=chat_name,
+                topic_id=topic_id,
+                topic_name=topic_name
+            ),
+            create,
+        )
+
+    async def _get_or_create(
+        self,
+        key: Tuple[int, Optional[int]],
+        load: Callable[[], Awaitable[Optional[str]]],
+        create: Callable[[], Awaitable[str]],
+    ) -> str:
+        if key in self.pages:
+            return self.pages[key]
+
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self.pages:
+                return self.pages[key]
+
+            generation = self.generation
+            page_id = await load() or await create()
+            # Don't cache a page that was invalidated while we were creating it
+            if generation == self.generation:
+                self.pages[key] = page_id
+            return page_id
+
+    def invalidate(self, chat_id: Optional[int] = None):
+        """Forget cached pages, of one chat or all of them"""
+        self.generation += 1
+        if chat_id is None:
+            self.pages.clear()
+            return
+        for key in [key for key in self.pages if key[0] == chat_id]:
+            self.pages.pop(key, None)
+
+
+notion_page_cache = NotionPageCache()
+
+
+class NotionIndexWorker:
+    """Index messages to Notion in the background, off the transfer path
+
+    Message document IDs are queued as they are saved and picked up by a few
+    worker tasks. The queue is bounded, so producers wait when indexing falls
+    too far behind. Failed messages are queued again with exponential backoff,
+    and a periodic sweep queues whatever is still unindexed in the database.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 1000):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending = set()
+        self.failures: Dict = {}
+        self.tasks = []
+        self.retries = set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of messages waiting to be indexed"""
+        return self.queue.qsize() if self.queue else 0
+
+    async def start(self):
+        """Start the workers and queue every message left unindexed by a previous run"""
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue(maxsize=max(self.max_queue, 1))
+        self.tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(max(self.workers, 1))
+        ]
+        self.tasks.append(asyncio.create_task(self._sweep()))
+        logger.info(f"Notion indexer started with {len(self.tasks) - 1} workers")
+
+    async def stop(self):
+        tasks = self.tasks + list(self.retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks = []
+        self.retries.clear()
+
+    async def enqueue(self, _id):
+        """Queue a message document for indexing, waiting while the queue is full"""
+        if self.queue is None or _id in self.pending:
+            return
+        self.pending.add(_id)
+        await self.queue.put(_id)
+
+    async def _sweep(self):
+        """Queue every unindexed message, at startup and then every SWEEP_INTERVAL seconds"""
+        while True:
+            try:
+                ids = await db.messages.get_unindexed_ids()
+            except Exception as e:
+                logger.error(f"Notion sweep failed: {e}")
+            else:
+                if ids:
+                    logger.info(f"Notion sweep: {len(ids)} unindexed messages")
+                for _id in ids:
+                    await self.enqueue(_id)
+            await asyncio.sleep(SWEEP_INTERVAL)
+
+    def _schedule_retry(self, _id):
+        """Queue a failed message again after a backoff, keeping it pending meanwhile"""
+        attempt = self.failures.get(_id, 0) + 1
+        self.failures[_id] = attempt
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+
+        async def retry():
+            await asyncio.sleep(delay)
+            self.pending.discard(_id)
+            await self.enqueue(_id)
+
+        task = asyncio.create_task(retry())
+        self.retries.add(task)
+        task.add_done_callback(self.retries.discard)
+        logger.info(f"Retrying message {_id} in {delay}s (attempt {attempt})")
+
+    async def _worker(self, number: int):
+        while True:
+            _id = await self.queue.get()
+            failed = False
+            try:
+                msg = await db.messages.read(_id)
+                if msg and not msg.get("indexed", False):
+                    await index_message_to_notion(msg)
+                self.failures.pop(_id, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to index message {_id}: {e}")
+                failed = True
+                self._schedule_retry(_id)
+            finally:
+                if not failed:
+                    self.pending.discard(_id)
+                self.queue.task_done()
+
+
+notion_indexer = NotionIndexWorker(
+    workers=Config.NOTION_INDEX_WORKERS, max_queue=Config.NOTION_INDEX_QUEUE_SIZE
+)
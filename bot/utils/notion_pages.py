@@ -9,10 +9,10 @@ Description: Minimal Notion Pages API wrapper
 
 from typing import Any, Dict, List, Optional
 
-import requests
 from pydantic import BaseModel
 
 from bot.config import Config
+from bot.utils.notion_client import NotionAPIError, notion_client
 
 # Notion API limits for text content in blocks
 NOTION_MAX_TEXT_LENGTH = 2000
@@ -55,14 +55,8 @@ class NotionPageCreator:
     def __init__(self, token: Optional[str] = None, default_parent_id: Optional[str] = None):
         self.token = token or Config.NOTION_TOKEN
         self.default_parent_id = default_parent_id or Config.NOTION_PARENT_PAGE_ID 
-        self.base_url = "https://api.notion.com/v1"
-        self.headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Notion-Version": "2022-06-28",
-            "Content-Type": "application/json"
-        }
 
-    def create_page(
+    async def create_page(
         self,
         title: str,
         parent_page_id: Optional[str] = None,
@@ -73,17 +67,14 @@ class NotionPageCreator:
         payload = self._create_payload(title, parent_page_id, initial_blocks)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/pages", headers=self.headers, json=payload
-            )
-            response.raise_for_status()
-            page_id = response.json()["id"]
+            response = await notion_client.post("pages", token=self.token, json=payload)
+            page_id = response["id"]
             
             if blocks and len(blocks) > 100:
-                self._append_block_chunks(page_id, blocks[100:])
+                await self._append_block_chunks(page_id, blocks[100:])
                 
             return page_id
-        except requests.RequestException as exception:
+        except NotionAPIError as exception:
             raise NotionPageError(self._format_error(exception)) from exception
 
     def _create_payload(
@@ -102,25 +93,21 @@ class NotionPageCreator:
             payload["children"] = initial_blocks
         return payload
 
-    def _append_block_chunks(self, block_id: str, blocks: List[Dict]) -> None:
+    async def _append_block_chunks(self, block_id: str, blocks: List[Dict]) -> None:
         """Append block children in chunks of 100 to avoid Notion API limit"""
         for start_index in range(0, len(blocks), 100):
             chunk = blocks[start_index:start_index + 100]
-            response = requests.patch(
-                f"{self.base_url}/blocks/{block_id}/children",
-                headers=self.headers,
+            await notion_client.patch(
+                f"blocks/{block_id}/children",
+                token=self.token,
                 json={"children": chunk}
             )
-            response.raise_for_status()
 
-    def _format_error(self, exception: requests.RequestException) -> str:
+    def _format_error(self, exception: NotionAPIError) -> str:
         """Format request exception with response body if available"""
         error_msg = f"Failed to create Notion page: {str(exception)}"
-        if hasattr(exception, "response") and exception.response is not None:
-            try:
-                error_msg += f"\nResponse: {exception.response.text}"
-            except Exception:
-                pass
+        if exception.response_text:
+            error_msg += f"\nResponse: {exception.response_text}"
         return error_msg
 
     def create_text_block(self, text: str) -> List[Dict]:
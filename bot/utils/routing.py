@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: routing.py
+Author: Maria Kevin
+Description: Cache of validated destination channels per source chat
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pyrogram import Client
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Routes are re-validated after this many seconds even without an invalidation
+ROUTES_TTL = 30 * 60
+
+
+class RoutingTable:
+    """Process-wide (user, source chat) -> destination channels cache
+
+    Each destination is checked with ``get_chat`` once when the routes are
+    built instead of once per forwarded message. The channel handlers drop a
+    user's routes whenever a pair changes, and a failed send drops the routes
+    of its source so the next message re-validates them.
+    """
+
+    def __init__(self, ttl: int = ROUTES_TTL):
+        self.ttl = ttl
+        self.routes: Dict[Tuple[int, int], Tuple[float, List[dict]]] = {}
+        self.locks: Dict[Tuple[int, int], asyncio.Lock] = {}
+
+    async def get_routes(self, bot: Client, user_id: int, source_chat_id: int) -> List[dict]:
+        """
+        Get the active, reachable channel pairs of a source chat.
+
+        Args:
+            bot: Bot client that sends to the destinations
+            user_id: Owner of the channel pairs
+            source_chat_id: Chat the messages come from
+
+        Returns:
+            user_channels documents, empty if the user has no reachable destination
+        """
+        key = (user_id, source_chat_id)
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._get_cached(key)
+            if cached is not None:
+                return cached
+
+            routes = await self._build(bot, user_id, source_chat_id)
+            self.routes[key] = (time.monotonic(), routes)
+            return routes
+
+    def _get_cached(self, key: Tuple[int, int]) -> Optional[List[dict]]:
+        entry = self.routes.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    async def _build(self, bot: Client, user_id: int, source_chat_id: int) -> List[dict]:
+        valid_channels = []
+
+        user_channels = await db.user_channels.filter_documents(
+            {"user_id": user_id, "source_channel_id": source_chat_id, "status": True}
+        )
+        for channel in user_channels:
+            dest_channel_id = channel["destination_channel_id"]
+            try:
+                await bot.get_chat(dest_channel_id)
+            except Exception as e:
+                logger.warning(f"Destination {dest_channel_id} unavailable: {e}")
+                await bot.floodwait_handler(
+                    bot.send_message,
+                    user_id,
+                    f"Chat not found - {dest_channel_id}",
+                )
+                continue
+
+            valid_channels.append(channel)
+        return valid_channels
+
+    def invalidate(self, user_id: Optional[int] = None, source_chat_id: Optional[int] = None):
+        """Forget cached routes, of one source, one user or everyone"""
+        if user_id is None:
+            self.routes.clear()
+            return
+        for key in [key for key in self.routes if key[0] == user_id]:
+            if source_chat_id is None or key[1] == source_chat_id:
+                self.routes.pop(key, None)
+
+
+routing_table = RoutingTable()
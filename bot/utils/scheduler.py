@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: scheduler.py
+Author: Maria Kevin
+Description: Run transfers concurrently per user account while keeping results in order
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bot.config import Config
+
+logger = logging.getLogger(__name__)
+
+# account key -> semaphore limiting concurrent transfers on that account
+ACCOUNT_SLOTS: Dict[str, asyncio.Semaphore] = {}
+# account key -> monotonic time until which the account is flood-waited
+FLOOD_WAITS: Dict[str, float] = {}
+# (account key, method) -> adaptive pacing of that kind of call
+RATE_CONTROLLERS: Dict[Tuple[str, str], "RateController"] = {}
+
+
+class RateController:
+    """AIMD pacing of calls on one account
+
+    The rate grows by a fixed step after every successful call and is halved
+    on each FloodWait, within the PACING_MIN_INTERVAL / PACING_MAX_INTERVAL
+    bounds. Callers take turns through ``acquire``, so concurrent workers
+    share the rate.
+    """
+
+    def __init__(
+        self,
+        start_interval: float,
+        min_interval: float,
+        max_interval: float,
+        increase: float,
+        decrease: float = 0.5,
+    ):
+        self.min_rate = 1 / max(max_interval, 0.001)
+        self.max_rate = 1 / max(min_interval, 0.001)
+        self.rate = min(max(1 / max(start_interval, 0.001), self.min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.next_at = 0.0
+        # (unix time, seconds) of the latest FloodWaits
+        self.recent_waits = deque(maxlen=5)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait for the next call slot"""
+        async with self._lock:
+            delay = self.next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at = time.monotonic() + 1 / self.rate
+
+    def on_success(self):
+        self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def on_flood_wait(self, seconds: float):
+        self.rate = max(self.rate * self.decrease, self.min_rate)
+        self.recent_waits.append((time.time(), seconds))
+
+
+def get_rate_controller(client, method: str = "transfer", create: bool = True) -> Optional[RateController]:
+    """Get the pacing of a kind of call on an account"""
+    key = (get_account_key(client), method)
+    if key not in RATE_CONTROLLERS and create:
+        RATE_CONTROLLERS[key] = RateController(
+            start_interval=Config.PACING_START_INTERVAL,
+            min_interval=Config.PACING_MIN_INTERVAL,
+            max_interval=Config.PACING_MAX_INTERVAL,
+            increase=Config.PACING_INCREASE,
+        )
+    return RATE_CONTROLLERS.get(key)
+
+
+async def pace(client, method: str = "transfer"):
+    """Wait out any FloodWait on the account, then for the method's next slot"""
+    await wait_for_account(client)
+    await get_rate_controller(client, method).acquire()
+
+
+def note_success(client, method: str = "transfer"):
+    """Let the account's pacing speed up after a successful call"""
+    get_rate_controller(client, method).on_success()
+
+
+def get_pacing_stats(client, method: str = "transfer") -> Optional[dict]:
+    """Current rate and latest FloodWaits of a method, None if it isn't paced yet"""
+    controller = get_rate_controller(client, method, create=False)
+    if not controller:
+        return None
+    return {
+        "rate": controller.rate,
+        "recent_waits": [seconds for _, seconds in controller.recent_waits],
+    }
+
+
+def get_account_key(client) -> str:
+    """Return a stable key for a client (or an object bound to one, like a Message)"""
+    client = getattr(client, "_client", client)
+    return getattr(client, "name", None) or str(id(client))
+
+
+def get_account_slots(client) -> asyncio.Semaphore:
+    """Get the transfer semaphore of an account"""
+    key = get_account_key(client)
+    if key not in ACCOUNT_SLOTS:
+        ACCOUNT_SLOTS[key] = asyncio.Semaphore(max(Config.TRANSFER_CONCURRENCY, 1))
+    return ACCOUNT_SLOTS[key]
+
+
+def note_flood_wait(client, seconds: float, method: Optional[str] = None):
+    """
+    Record a FloodWait so every worker on the account holds off until it expires.
+
+    The account's transfer pacing backs off too, as does the method's own
+    pacing if it has one.
+    """
+    key = get_account_key(client)
+    FLOOD_WAITS[key] = max(FLOOD_WAITS.get(key, 0), time.monotonic() + seconds)
+
+    get_rate_controller(client).on_flood_wait(seconds)
+    if method and method != "transfer":
+        controller = get_rate_controller(client, method, create=False)
+        if controller:
+            controller.on_flood_wait(seconds)
+
+
+async def wait_for_account(client):
+    """Sleep until any FloodWait recorded for the account has passed"""
+    delay = FLOOD_WAITS.get(get_account_key(client), 0) - time.monotonic()
+    if delay > 0:
+        logger.info(f"Waiting {delay:.0f}s for FloodWait on {get_account_key(client)}")
+        await asyncio.sleep(delay)
+
+
+async def run_in_order(
+    client,
+    items: Iterable[Any],
+    worker: Callable[[int, Any], Awaitable[Any]],
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[Any]:
+    """
+    Run ``worker(index, item)`` for every item, at most Config.TRANSFER_CONCURRENCY
+    at once on the client's account.
+
+    Args:
+        client: Account the work runs on
+        items: Items to process, indexed from 1
+        worker: Coroutine function handling a single item
+        should_stop: Checked before each item starts; once True the remaining items are skipped
+
+    Returns:
+        Worker results in the order of ``items``, None for skipped items
+    """
+    slots = get_account_slots(client)
+
+    async def run(index: int, item: Any):
+        async with slots:
+            if should_stop and should_stop():
+                return None
+            await wait_for_account(client)
+            return await worker(index, item)
+
+    return await asyncio.gather(*[run(i, item) for i, item in enumerate(items, 1)])
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: streaming.py
+Author: Maria Kevin
+Description: Stream media from the source chat straight into an upload without a disk round-trip
+"""
+
+import asyncio
+import logging
+import math
+from typing import Optional
+
+from pyrogram import Client, raw, types, utils
+
+logger = logging.getLogger(__name__)
+
+# Telegram accepts upload parts of at most 512 KiB, and files above 10 MiB
+# must be sent through SaveBigFilePart
+PART_SIZE = 512 * 1024
+BIG_FILE_SIZE = 10 * 1024 * 1024
+
+
+def is_streamable(message: types.Message) -> bool:
+    """Check if the message media can be piped from download into upload"""
+    media = message.video or message.audio or message.document
+    return bool(media and getattr(media, "file_size", 0))
+
+
+async def _produce_chunks(app: Client, message: types.Message, buffer: asyncio.Queue):
+    """Pull chunks from the source chat into the buffer, ending with a sentinel"""
+    try:
+        async for chunk in app.stream_media(message):
+            await buffer.put(chunk)
+        await buffer.put(None)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await buffer.put(e)
+
+
+async def _save_part(
+    app: Client, file_id: int, part: int, total_parts: int, is_big: bool, data: bytes
+):
+    """Upload a single file part"""
+    if is_big:
+        rpc = raw.functions.upload.SaveBigFilePart(
+            file_id=file_id, file_part=part, file_total_parts=total_parts, bytes=data
+        )
+    else:
+        rpc = raw.functions.upload.SaveFilePart(file_id=file_id, file_part=part, bytes=data)
+
+    if not await app.invoke(rpc):
+        raise Exception(f"Failed to upload part {part} of {total_parts}")
+
+
+async def _consume_chunks(
+    app: Client,
+    buffer: asyncio.Queue,
+    file_id: int,
+    file_size: int,
+    progress=None,
+    progress_args: tuple = (),
+) -> int:
+    """Re-slice buffered chunks into upload parts and upload them as they arrive"""
+    total_parts = math.ceil(file_size / PART_SIZE)
+    is_big = file_size > BIG_FILE_SIZE
+    pending = bytearray()
+    part = 0
+    uploaded = 0
+
+    async def flush(data: bytes):
+        nonlocal part, uploaded
+        await _save_part(app, file_id, part, total_parts, is_big, data)
+        part += 1
+        uploaded += len(data)
+        if progress:
+            await progress(min(uploaded, file_size), file_size, *progress_args)
+
+    while True:
+        item = await buffer.get()
+        if isinstance(item, Exception):
+            raise item
+        if item is None:
+            break
+
+        pending.extend(item)
+        while len(pending) >= PART_SIZE:
+            await flush(bytes(pending[:PART_SIZE]))
+            del pending[:PART_SIZE]
+
+    if pending:
+        await flush(bytes(pending))
+
+    if part != total_parts:
+        raise Exception(f"Stream ended after {part} of {total_parts} parts")
+    return part
+
+
+def _get_input_media(message: types.Message, input_file, file_name: str):
+    """Build the raw media object matching the source message"""
+    attributes = [raw.types.DocumentAttributeFilename(file_name=file_name)]
+
+    if message.video:
+        media = message.video
+        attributes.append(
+            raw.types.DocumentAttributeVideo(
+                supports_streaming=True,
+                duration=media.duration or 0,
+                w=media.width or 0,
+                h=media.height or 0,
+            )
+        )
+    elif message.audio:
+        media = message.audio
+        attributes.append(
+            raw.types.DocumentAttributeAudio(
+                duration=media.duration or 0,
+                performer=media.performer,
+                title=media.title,
+            )
+        )
+    else:
+        media = message.document
+
+    return raw.types.InputMediaUploadedDocument(
+        mime_type=getattr(media, "mime_type", None) or "application/octet-stream",
+        file=input_file,
+        attributes=attributes,
+    )
+
+
+async def stream_media_to_chat(
+    app: Client,
+    message: types.Message,
+    chat_id: int,
+    file_name: str,
+    caption: str = "",
+    message_thread_id: Optional[int] = None,
+    buffer_size: int = 8,
+    progress=None,
+    progress_args: tuple = (),
+) -> Optional[int]:
+    """
+    Download a message's media and upload it to a chat concurrently.
+
+    Chunks pulled from the source via ``app`` are fed through a bounded
+    in-memory buffer straight into the upload, so the upload starts while
+    the download is still running and nothing is written to disk.
+
+    Args:
+        app: User client with access to the source chat
+        message: Source message with video, audio or document media
+        chat_id: Chat to upload the media to
+        file_name: File name for the uploaded document
+        caption: Caption for the uploaded message
+        message_thread_id: Topic to post the message in
+        buffer_size: Number of 1 MiB chunks held in memory at most
+        progress: Callback called with (current, total, *progress_args)
+        progress_args: Extra arguments for the progress callback
+
+    Returns:
+        ID of the uploaded message, None if it couldn't be found in the response
+    """
+    media = message.video or message.audio or message.document
+    file_size = media.file_size
+    file_id = app.rnd_id()
+
+    buffer = asyncio.Queue(maxsize=max(buffer_size, 1))
+    producer = asyncio.create_task(_produce_chunks(app, message, buffer))
+
+    try:
+        parts = await _consume_chunks(
+            app, buffer, file_id, file_size, progress, progress_args
+        )
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+    if file_size > BIG_FILE_SIZE:
+        input_file = raw.types.InputFileBig(id=file_id, parts=parts, name=file_name)
+    else:
+        input_file = raw.types.InputFile(
+            id=file_id, parts=parts, name=file_name, md5_checksum=""
+        )
+
+    reply_to = None
+    if message_thread_id:
+        reply_to = raw.types.InputReplyToMessage(
+            reply_to_msg_id=message_thread_id, top_msg_id=message_thread_id
+        )
+
+    text = await utils.parse_text_entities(
+        app, caption, None, message.caption_entities if caption else None
+    )
+
+    r = await app.invoke(
+        raw.functions.messages.SendMedia(
+            peer=await app.resolve_peer(chat_id),
+            media=_get_input_media(message, input_file, file_name),
+            reply_to=reply_to,
+            random_id=app.rnd_id(),
+            message=text["message"] or "",
+            entities=text["entities"],
+        )
+    )
+
+    for update in getattr(r, "updates", []):
+        if isinstance(
+            update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)
+        ):
+            return update.message.id
+
+    logger.warning(f"Streamed upload of {file_name} returned no message")
+    return None
@@ -1,14 +1,19 @@
 import os
-import time
 
-from pyrogram import Client, types
+from typing import Dict, Optional
+
+from pyrogram import Client, StopTransmission, errors, types
 
 from bot.config import Config
 from bot.exceptions import CancelledError
 from bot.utils.archive_handler import is_archive
 from bot.utils.ffmpeg import get_video_details
+from bot.utils.forum_topics import get_topics_by_chat_id, topic_directory
 from bot.utils.helpers import *
 from bot.utils.notion import upload_archive_to_notion, upload_message_to_notion
+from bot.utils.notion_indexer import notion_indexer
+from bot.utils.routing import routing_table
+from bot.utils.streaming import is_streamable, stream_media_to_chat
 from database import db
 
 from .media_type import get_media_type
@@ -19,25 +24,9 @@ logger = logging.getLogger(__name__)
 async def forward_message(
     bot: Client, app: Client, message: types.Message, user_id: int, notion_enabled: bool
 ):
-    valid_channels = []
-
     source_chat_id = message.chat.id
-    user_channels = await db.user_channels.filter_documents(
-        {"user_id": user_id, "source_channel_id": source_chat_id, "status": True}
-    )
-    for channel in user_channels:
-        dest_channel_id = channel["destination_channel_id"]
-        try:
-            await bot.get_chat(dest_channel_id)
-        except Exception as e:
-            await bot.floodwait_handler(
-                bot.send_message,
-                user_id,
-                f"Chat not found - {dest_channel_id}",
-            )
-            continue
-
-        valid_channels.append(channel)
+    # Copied, the fallback below must not end up in the cached routes
+    valid_channels = list(await routing_table.get_routes(bot, user_id, source_chat_id))
 
     if not valid_channels:
         valid_channels.append(
@@ -53,12 +42,46 @@ async def forward_message(
 
     file_path = None
     notion_file_id = None
+    archive_metadata = None
     progress_msg = None
 
+    # Same file_unique_id means the same file, whoever posted it and wherever
+    media = get_media(message)
+    file_unique_id = getattr(media, "file_unique_id", None) if Config.MEDIA_DEDUP else None
+    saved = await db.media_dedup.get(file_unique_id) if file_unique_id else None
+    if saved and notion_enabled:
+        notion_file_id = db.media_dedup.get_notion_file(saved, Config.MEDIA_DEDUP_NOTION_MAX_AGE)
+        if notion_file_id:
+            archive_metadata = saved.get("archive_files")
+
+    reused = False
     if message.text:
         log = await bot.send_message(
             Config.FILES_LOG, message.text, reply_markup=message.reply_markup
         )
+    elif (
+        saved
+        and (notion_file_id or not notion_enabled)
+        and (log := await copy_saved_media(bot, app, message, saved))
+    ):
+        reused = True
+        logger.info(f"Reused saved copy of {file_unique_id}: {message.link}")
+    elif not notion_enabled and (log := await copy_media(bot, app, message)):
+        # Notion needs the file on disk, otherwise a server-side copy moves no bytes here
+        logger.info(f"Copied media server-side: {message.link}")
+    elif Config.STREAM_TRANSFERS and not notion_enabled and is_streamable(message):
+        # Notion needs the file on disk, so only stream when it's not involved
+        try:
+            progress_msg = await bot.send_message(user_id, f"Processing media ({message.index})...")
+            log = await stream_media(bot, app, user_id, message, progress_msg)
+            if not log:
+                return
+        finally:
+            if progress_msg:
+                try:
+                    await progress_msg.delete()
+                except Exception:
+                    pass
     else:
         try:
             progress_msg = await bot.send_message(user_id, f"Processing media ({message.index})...")
@@ -83,16 +106,21 @@ async def forward_message(
                 except Exception:
                     pass
 
+    if file_unique_id and log and log.media and not reused:
+        await db.media_dedup.save_log(file_unique_id, log.chat.id, log.id)
+
     # Upload to Notion and save to DB
 
-    archive_metadata = None
-    
     if file_path and notion_enabled: # upload even if it already exists cause file expires after 30 days
         try:
             # Check if file is an archive (.zip or .rar)
             if is_archive(file_path):
                 logger.info(f"Detected archive file: {os.path.basename(file_path)}")
-                archive_result = upload_archive_to_notion(file_path)
+                archive_result = await upload_archive_to_notion(
+                    file_path,
+                    max_files=Config.ARCHIVE_MAX_FILES,
+                    max_total_size=Config.ARCHIVE_MAX_SIZE,
+                )
                 if archive_result and archive_result.file_ids:
                     # Store the first file ID as the primary media_url
                     notion_file_id = archive_result.file_ids[0]
@@ -106,7 +134,7 @@ async def forward_message(
                     }
             else:
                 # Regular file upload
-                notion_result = upload_message_to_notion(message, file_path)
+                notion_result = await upload_message_to_notion(message, file_path)
                 if notion_result:
                     notion_file_id = notion_result.file_id
         except Exception as e:
@@ -114,11 +142,14 @@ async def forward_message(
 
     if notion_enabled:
         # Save or update message metadata to DB with Notion file ID and archive metadata
-        await db.messages.get_or_update_from_pyrogram(
+        _id, should_index = await db.messages.get_or_update_from_pyrogram(
             message, 
             file_id=notion_file_id,
             archive_files=archive_metadata
         )
+        # Indexed in the background, waits here only if the indexer falls far behind
+        if should_index:
+            await notion_indexer.enqueue(_id)
 
     if not log:
         return await bot.send_message(
@@ -127,50 +158,57 @@ async def forward_message(
 
     caption = log.text or log.caption or ""
 
-    for channel in valid_channels:
-        topic_id = channel["topic_id"]
-        paid_star = (
-            channel["paid_media"]["stars"] if channel["paid_media"]["status"] else None
-        )
-        kwargs = {}
-        dest_channel_id = channel["destination_channel_id"]
-
-        if not topic_id:
-            await handle_topic_thread(app, message, dest_channel_id, kwargs)
-        else:
-            kwargs["message_thread_id"] = topic_id
-
-        if paid_star and (message.photo or message.video):
-            # send using paid media
-            if message.photo:
-                media = types.InputMediaPhoto(log.photo.file_id)
-            elif message.video:
-                media = types.InputMediaVideo(log.video.file_id)
-            await bot.floodwait_handler(
-                bot.send_paid_media,
-                chat_id=dest_channel_id,
-                stars_amount=paid_star,
-                media=[media],
-                caption=caption,
-                reply_to_message_id=topic_id,
-                **kwargs,
-            )
-        elif message.media:
-            r = await bot.floodwait_handler(
-                log.copy,
-                dest_channel_id,
-                caption=caption,
-                reply_markup=message.reply_markup,
-                **kwargs,
-            )
-        else:
-            await bot.floodwait_handler(
-                bot.send_message,
-                dest_channel_id,
-                caption,
-                reply_markup=message.reply_markup,
-                **kwargs,
+    try:
+        for channel in valid_channels:
+            topic_id = channel["topic_id"]
+            paid_star = (
+                channel["paid_media"]["stars"] if channel["paid_media"]["status"] else None
             )
+            kwargs = {}
+            dest_channel_id = channel["destination_channel_id"]
+
+            if not topic_id:
+                await handle_topic_thread(app, message, dest_channel_id, kwargs)
+            else:
+                kwargs["message_thread_id"] = topic_id
+
+            if paid_star and (message.photo or message.video):
+                # send using paid media
+                if message.photo:
+                    media = types.InputMediaPhoto(log.photo.file_id)
+                elif message.video:
+                    media = types.InputMediaVideo(log.video.file_id)
+                await bot.floodwait_handler(
+                    bot.send_paid_media,
+                    chat_id=dest_channel_id,
+                    stars_amount=paid_star,
+                    media=[media],
+                    caption=caption,
+                    reply_to_message_id=topic_id,
+                    **kwargs,
+                )
+            elif message.media:
+                r = await bot.floodwait_handler(
+                    log.copy,
+                    dest_channel_id,
+                    caption=caption,
+                    reply_markup=message.reply_markup,
+                    **kwargs,
+                )
+            else:
+                await bot.floodwait_handler(
+                    bot.send_message,
+                    dest_channel_id,
+                    caption,
+                    reply_markup=message.reply_markup,
+                    **kwargs,
+                )
+    except Exception:
+        # The destination may be gone or its settings changed, re-validate next time
+        routing_table.invalidate(user_id, source_chat_id)
+        if message.topic:
+            topic_directory.forget(dest_channel_id)
+        raise
 
     if file_path:
         os.remove(file_path)
@@ -186,7 +224,6 @@ async def download_media(bot, user_id, message: types.Message, progress_msg):
     if not media:
         return None
 
-    start = time.time()
     filename = get_file_name(message)
 
     if not filename:
@@ -196,14 +233,9 @@ async def download_media(bot, user_id, message: types.Message, progress_msg):
     file_path = await bot.floodwait_handler(
         message.download,
         file_name=filename,
-        progress=progress_for_pyrogram,
-        progress_args=(
-            start,
-            message,
-            progress_msg.edit,
-            download_id,
-            f"Downloading ({message.index})",
-        ),
+        progress=ProgressReporter(
+            progress_msg, download_id, f"Downloading ({message.index})"
+        ).update,
     )
     if not file_path:
         if is_transfer_cancelled(download_id):
@@ -211,6 +243,216 @@ async def download_media(bot, user_id, message: types.Message, progress_msg):
     return file_path
 
 
+# chat_id -> whether the chat forbids forwarding and saving its content
+PROTECTED_CHATS: Dict[int, bool] = {}
+
+
+async def is_chat_copyable(app: Client, chat_id: int) -> bool:
+    """Check if the chat allows copying its messages, caching its protection flag"""
+    if chat_id not in PROTECTED_CHATS:
+        try:
+            chat = await app.get_chat(chat_id)
+        except Exception as e:
+            logger.debug(f"Could not get chat {chat_id}: {e}")
+            return False
+        PROTECTED_CHATS[chat_id] = bool(chat.has_protected_content)
+    return not PROTECTED_CHATS[chat_id]
+
+
+async def is_copyable(app: Client, message: types.Message) -> bool:
+    """Check if the message can be copied server-side"""
+    if not message.media or message.has_protected_content:
+        return False
+    return await is_chat_copyable(app, message.chat.id)
+
+
+async def copy_media(bot, app: Client, message: types.Message) -> Optional[types.Message]:
+    """Copy the media into Config.FILES_LOG without downloading it, None if the source is protected"""
+    if not await is_copyable(app, message):
+        return None
+
+    kwargs = {}
+    await handle_topic_thread(app, message, Config.FILES_LOG, kwargs)
+
+    # None keeps the original caption and its entities
+    if "text" not in await get_media_type():
+        kwargs["caption"] = ""
+
+    try:
+        log = await bot.floodwait_handler(
+            app.copy_message,
+            Config.FILES_LOG,
+            message.chat.id,
+            message.id,
+            reply_markup=message.reply_markup,
+            **kwargs,
+        )
+    except errors.ChatForwardsRestricted:
+        # Protection was turned on since we cached the flag
+        PROTECTED_CHATS[message.chat.id] = True
+        return None
+
+    # Bound to the bot, so destinations are posted to and file ids reused by the bot
+    return await bot.get_messages(Config.FILES_LOG, log.id)
+
+
+async def copy_saved_media(
+    bot, app: Client, message: types.Message, saved: dict
+) -> Optional[types.Message]:
+    """
+    Copy an earlier saved copy of the message's file into Config.FILES_LOG,
+    with the message's own caption and topic.
+
+    Args:
+        bot: Bot client
+        app: User client, for the topic lookup
+        message: Message whose file was saved before
+        saved: media_dedup entry of the file
+
+    Returns:
+        The new log message, None if the saved copy is gone or couldn't be copied
+    """
+    if not saved.get("log_message_id"):
+        return None
+
+    kwargs = {}
+    await handle_topic_thread(app, message, Config.FILES_LOG, kwargs)
+
+    if "text" in await get_media_type():
+        kwargs["caption"] = message.caption or ""
+        kwargs["caption_entities"] = message.caption_entities
+    else:
+        kwargs["caption"] = ""
+
+    try:
+        log = await bot.floodwait_handler(
+            bot.copy_message,
+            Config.FILES_LOG,
+            saved["log_chat_id"],
+            saved["log_message_id"],
+            reply_markup=message.reply_markup,
+            **kwargs,
+        )
+    except errors.MessageIdInvalid:
+        log = None
+    except Exception as e:
+        # Likely transient, keep the entry for the next copy
+        logger.warning(f"Could not copy saved copy of {saved['file_unique_id']}: {e}")
+        return None
+
+    if not log:
+        # Deleted from the log chat (pyrogram copies an empty message to nothing), transfer the file again
+        logger.warning(f"Saved copy of {saved['file_unique_id']} was deleted")
+        await db.media_dedup.forget_log(saved["file_unique_id"])
+    return log
+
+
+async def copy_message_group(bot, app: Client, messages: list, user_id: int):
+    """
+    Copy messages of one source topic into Config.FILES_LOG with a single
+    call, then fan them out from there to every destination of the source
+    with one bot call per chat, like forward_message does per message.
+
+    Args:
+        bot: Bot client
+        app: User client with access to the source chat
+        messages: Up to 100 messages from the same chat and topic
+        user_id: Owner of the channel pairs
+
+    Raises:
+        errors.ChatForwardsRestricted: If the source chat is protected
+    """
+    source = messages[0]
+    chat_id = source.chat.id
+
+    kwargs = {}
+    await handle_topic_thread(app, source, Config.FILES_LOG, kwargs)
+    try:
+        logs = await bot.floodwait_handler(
+            app.forward_messages,
+            Config.FILES_LOG,
+            chat_id,
+            [message.id for message in messages],
+            hide_sender_name=True,
+            hide_captions="text" not in await get_media_type(),
+            **kwargs,
+        )
+    except errors.ChatForwardsRestricted:
+        PROTECTED_CHATS[chat_id] = True
+        raise
+    log_ids = [log.id for log in logs]
+
+    routes = await routing_table.get_routes(bot, user_id, chat_id)
+    targets = [(route["destination_channel_id"], route["topic_id"]) for route in routes]
+    if not targets:
+        targets.append((user_id, None))
+
+    try:
+        for dest_chat_id, topic_id in targets:
+            kwargs = {}
+            if topic_id:
+                kwargs["message_thread_id"] = topic_id
+            else:
+                await handle_topic_thread(app, source, dest_chat_id, kwargs)
+
+            # Captions were already dropped in the log copies if text isn't wanted
+            await bot.floodwait_handler(
+                bot.forward_messages,
+                dest_chat_id,
+                Config.FILES_LOG,
+                log_ids,
+                hide_sender_name=True,
+                **kwargs,
+            )
+    except Exception:
+        # The destination may be gone or its settings changed, re-validate next time
+        routing_table.invalidate(user_id, chat_id)
+        if source.topic:
+            topic_directory.forget(dest_chat_id)
+        raise
+
+
+async def stream_media(bot, app: Client, user_id, message: types.Message, progress_msg):
+    """Pipe the media into Config.FILES_LOG while it's still downloading"""
+    download_id = message.download_id
+
+    filename = get_title(message) or get_file_name(message)
+    if not filename:
+        await bot.send_message(user_id, "No file name found.")
+        return None
+
+    kwargs = {}
+    await handle_topic_thread(app, message, Config.FILES_LOG, kwargs)
+
+    caption = ""
+    if "text" in await get_media_type():
+        caption = message.text or message.caption or ""
+
+    try:
+        log_id = await stream_media_to_chat(
+            app,
+            message,
+            Config.FILES_LOG,
+            filename,
+            caption=caption,
+            message_thread_id=kwargs.get("message_thread_id"),
+            buffer_size=Config.STREAM_BUFFER_CHUNKS,
+            progress=ProgressReporter(
+                progress_msg, download_id, f"Streaming ({message.index})"
+            ).update,
+        )
+    except StopTransmission:
+        raise CancelledError
+
+    if not log_id:
+        if is_transfer_cancelled(download_id):
+            raise CancelledError
+        raise Exception("Failed to upload message")
+
+    logger.info(f"Streamed media file: {filename}: {message.link}")
+    return await bot.get_messages(Config.FILES_LOG, log_id)
+
+
 async def upload_media(
     user_id,
     bot: Client,
@@ -226,7 +468,7 @@ async def upload_media(
     function = None
 
     tg_user = await bot.get_users(user_id)
-    thumbnail = await get_thumbnail(file_path)
+    thumbnail = await get_thumbnail(file_path, message, app)
 
     function, kwargs = await get_upload_function(message, upload_instance, file_path)
 
@@ -254,14 +496,9 @@ async def upload_media(
     if title:
         kwargs["file_name"] = title
 
-    kwargs["progress"] = progress_for_pyrogram
-    kwargs["progress_args"] = (
-        time.time(),
-        message,
-        progress_msg.edit,
-        message.download_id,
-        f"Uploading ({message.index})",
-    )
+    kwargs["progress"] = ProgressReporter(
+        progress_msg, message.download_id, f"Uploading ({message.index})"
+    ).update
     logger.info("upload start")
 
     caption = message.text or message.caption or ""
@@ -274,8 +511,7 @@ async def upload_media(
     await bot.floodwait_handler(progress_msg.edit, "Uploading...")
 
     log = await bot.floodwait_handler(function, **kwargs)
-    if thumbnail:
-        os.remove(thumbnail)
+    release_thumbnail(thumbnail)
     if not log:
         if is_transfer_cancelled(message.download_id):
             raise CancelledError
@@ -377,20 +613,6 @@ def get_extension(file_name):
     return file_name.split(".")[-1]
 
 
-async def get_topics_by_chat_id(client: Client, chat_id: int):
-    """Get all topics from a chat and return a dict mapping topic names to topic IDs"""
-    from typing import Dict
-
-    topics: Dict[str, int] = {}
-    try:
-        async for topic in client.get_forum_topics(chat_id):
-            topics[topic.title] = topic.id
-    except Exception as e:
-        logger.error(f"Error getting topics from chat {chat_id}: {e}")
-
-    return topics
-
-
 async def get_source_topics(client: Client, source_chat_id: int):
     """Get all topics from the source channel"""
     return await get_topics_by_chat_id(client, source_chat_id)
@@ -414,46 +636,10 @@ async def handle_topic_thread(
     """
     source_topic = message.topic and message.topic.id
     if source_topic:
-        source_topic_name = message.topic.title
-        target_topics = await get_target_topics(app, channel_id)
-        target_topic = await create_topic_if_not_exists(
-            app, channel_id, source_topic_name, target_topics
+        # Batch workers borrow accounts that may not be in the target chats
+        client = getattr(message, "topic_client", None) or app
+        target_topic = await topic_directory.get_topic_id(
+            client, channel_id, message.topic.title
         )
         if target_topic:
             kwargs["message_thread_id"] = target_topic
-
-
-async def create_topic_if_not_exists(
-    client: Client, target_chat_id: int, topic_name: str, existing_topics: dict
-):
-    """
-    Create a topic in the target chat if it doesn't already exist.
-    Returns the topic ID (either existing or newly created).
-
-    Args:
-        client: Pyrogram client
-        target_chat_id: Target chat ID
-        topic_name: Name of the topic to create
-        existing_topics: Dict of existing topics {name: id}
-
-    Returns:
-        int: Topic ID
-    """
-    # Check if topic already exists
-    if topic_name in existing_topics:
-        logger.info(
-            f"Topic '{topic_name}' already exists with ID {existing_topics[topic_name]}"
-        )
-        return existing_topics[topic_name]
-
-    # Create new topic
-    try:
-        topic = await client.create_forum_topic(
-            chat_id=target_chat_id, title=topic_name
-        )
-        logger.info(f"Created new topic '{topic_name}' with ID {topic.id}")
-        existing_topics[topic_name] = topic.id  # Update the cache
-        return topic.id
-    except Exception as e:
-        logger.error(f"Error creating topic '{topic_name}': {e}")
-        return None
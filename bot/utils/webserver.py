@@ -13,6 +13,10 @@ import os
 
 from aiohttp import ClientSession, web
 
+from bot.utils.notion_client import notion_client
+from bot.utils.notion_indexer import notion_indexer
+from database import db
+
 __author__ = "Maria Kevin"
 __version__ = "0.1.0"
 
@@ -28,7 +32,10 @@ async def start_webserver():
         """Health check endpoint"""
         return web.json_response({
             "status": "running",
-            "message": "Bot is alive!"
+            "message": "Bot is alive!",
+            "notion_queue": notion_client.queue_depth,
+            "notion_index_queue": notion_indexer.queue_depth,
+            "db_pool": db.pool_stats(),
         })
 
     async def web_server():
@@ -1,6 +1,10 @@
 from bot.config import Config
 
 from .config import ConfigDB
+from .core import pool_stats
+from .forum_topics import ForumTopicsDB
+from .indexes import ensure_indexes
+from .media_dedup import MediaDedupDB
 from .messages import MessagesDB
 from .notion_config import NotionConfigDB
 from .notion_mapping import NotionMappingDB
@@ -20,5 +24,15 @@ class Database:
         self.notion_mapping = NotionMappingDB(Config.DATABASE_URL, Config.DATABASE_NAME)
         self.notion_config = NotionConfigDB(Config.DATABASE_URL, Config.DATABASE_NAME)
         self.batch_tasks = BatchTasksDB(Config.DATABASE_URL, Config.DATABASE_NAME)
+        self.forum_topics = ForumTopicsDB(Config.DATABASE_URL, Config.DATABASE_NAME)
+        self.media_dedup = MediaDedupDB(Config.DATABASE_URL, Config.DATABASE_NAME)
+
+    def pool_stats(self) -> dict:
+        """Connection pool counters of the shared client"""
+        return pool_stats.as_dict()
+
+    async def ensure_indexes(self) -> dict:
+        """Create the declared indexes and report missing or unused ones"""
+        return await ensure_indexes(self.users.db)
 
 db = Database()
@@ -1,9 +1,89 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from bot.config import Config
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts connection pool events of the shared client"""
+
+    def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.check_out_failed = 0
+        self.cleared = 0
+
+    def as_dict(self):
+        return {
+            "open": self.created - self.closed,
+            "in_use": self.checked_out,
+            "created": self.created,
+            "closed": self.closed,
+            "check_out_failed": self.check_out_failed,
+            "cleared": self.cleared,
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.check_out_failed += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+
+pool_stats = PoolStats()
+_clients = {}
+
+
+def get_client(uri) -> AsyncIOMotorClient:
+    """Get the process-wide client for a URI, so every collection shares one pool"""
+    if uri not in _clients:
+        kwargs = {
+            "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+            "serverSelectionTimeoutMS": Config.MONGO_SERVER_TIMEOUT_MS,
+            "connectTimeoutMS": Config.MONGO_CONNECT_TIMEOUT_MS,
+            "event_listeners": [pool_stats],
+        }
+        if Config.MONGO_READ_CONCERN:
+            kwargs["readConcernLevel"] = Config.MONGO_READ_CONCERN
+        if Config.MONGO_WRITE_CONCERN:
+            w = Config.MONGO_WRITE_CONCERN
+            kwargs["w"] = int(w) if w.isdigit() else w
+        _clients[uri] = AsyncIOMotorClient(uri, **kwargs)
+    return _clients[uri]
 
 
 class Core:
     def __init__(self, uri, database_name, col):
-        self._client = AsyncIOMotorClient(uri)
+        self._client = get_client(uri)
         self.db = self._client[database_name]
         self.col = self.db[col]
 
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: forum_topics.py
+Author: Maria Kevin
+Description: Maps forum topic names to topic IDs per chat
+"""
+
+from typing import Dict
+
+from pymongo import DeleteMany, UpdateOne
+
+from database.core import Core
+
+
+class ForumTopicsDB(Core):
+    """Topic name -> topic_id directory of forum chats"""
+
+    def __init__(self, uri, database_name):
+        super().__init__(uri, database_name, "forum_topics")
+
+    async def get_topics(self, chat_id: int) -> Dict[str, int]:
+        """Get every known topic of a chat as {title: topic_id}"""
+        cursor = self.col.find({"chat_id": chat_id}, {"title": 1, "topic_id": 1})
+        return {doc["title"]: doc["topic_id"] async for doc in cursor}
+
+    async def save_topic(self, chat_id: int, title: str, topic_id: int):
+        """Insert or update a single topic"""
+        return await self.col.update_one(
+            {"chat_id": chat_id, "title": title},
+            {"$set": {"topic_id": topic_id}},
+            upsert=True,
+        )
+
+    async def replace_topics(self, chat_id: int, topics: Dict[str, int]):
+        """
+        Replace the stored topics of a chat with a fresh listing.
+
+        Topics are upserted and only titles missing from the listing are
+        deleted, so readers never see an empty chat and a concurrent
+        save_topic can't collide with the unique (chat_id, title) index.
+        """
+        requests = [
+            UpdateOne(
+                {"chat_id": chat_id, "title": title},
+                {"$set": {"topic_id": topic_id}},
+                upsert=True,
+            )
+            for title, topic_id in topics.items()
+        ]
+        requests.append(DeleteMany({"chat_id": chat_id, "title": {"$nin": list(topics)}}))
+        await self.col.bulk_write(requests, ordered=True)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: indexes.py
+Author: Maria Kevin
+Description: Declared indexes of every collection, created on startup
+"""
+
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# collection -> indexes its hot queries need
+INDEXES: Dict[str, List[IndexModel]] = {
+    "messages": [
+        # message_exists, once per forwarded message
+        IndexModel(
+            [("message_id", ASCENDING), ("chat_id", ASCENDING)],
+            name="message_chat",
+            unique=True,
+        ),
+        # get_unindexed_ids
+        IndexModel([("indexed", ASCENDING)], name="indexed"),
+    ],
+    "batch_tasks": [
+        # get_active_task / get_user_tasks
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_status"),
+        # get_max_message_id
+        IndexModel(
+            [("source_chat_id", ASCENDING), ("last_message_id", DESCENDING)],
+            name="source_last_message",
+        ),
+    ],
+    "user_channels": [
+        # forward_message routing lookup
+        IndexModel(
+            [("user_id", ASCENDING), ("source_channel_id", ASCENDING), ("status", ASCENDING)],
+            name="user_source_status",
+        ),
+    ],
+    "transfers": [
+        # resume_transfers
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "notion_mapping": [
+        IndexModel([("chat_id", ASCENDING), ("topic_id", ASCENDING)], name="chat_topic"),
+    ],
+    "forum_topics": [
+        IndexModel(
+            [("chat_id", ASCENDING), ("title", ASCENDING)],
+            name="chat_title",
+            unique=True,
+        ),
+    ],
+    "media_dedup": [
+        # forward_message lookup, once per media message
+        IndexModel(
+            [("file_unique_id", ASCENDING)],
+            name="file_unique_id",
+            unique=True,
+        ),
+    ],
+    "config": [
+        IndexModel([("name", ASCENDING)], name="name"),
+    ],
+}
+
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """
+    Create every declared index, skipping the ones that already exist.
+
+    A failed build (e.g. duplicates blocking a unique index) is logged and
+    reported as missing instead of stopping the bot.
+
+    Args:
+        database: Motor database holding the collections
+
+    Returns:
+        Dict with the "missing" and "unused" indexes as "collection.name" strings
+    """
+    report = {"missing": [], "unused": []}
+
+    for collection, models in INDEXES.items():
+        col = database[collection]
+        for model in models:
+            try:
+                await col.create_indexes([model])
+            except PyMongoError as e:
+                logger.error(f"Failed to create index {collection}.{model.document['name']}: {e}")
+
+        report["missing"].extend(await get_missing_indexes(col, models))
+        report["unused"].extend(await get_unused_indexes(col))
+
+    if report["missing"]:
+        logger.warning(f"Missing indexes: {', '.join(report['missing'])}")
+    if report["unused"]:
+        logger.info(f"Unused indexes since server start: {', '.join(report['unused'])}")
+    return report
+
+
+async def get_missing_indexes(col, models: List[IndexModel]) -> List[str]:
+    """Declared indexes not present on the collection"""
+    existing = await col.index_information()
+    return [
+        f"{col.name}.{model.document['name']}"
+        for model in models
+        if model.document["name"] not in existing
+    ]
+
+
+async def get_unused_indexes(col) -> List[str]:
+    """Indexes without a single access since the server started"""
+    try:
+        stats = await col.aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except PyMongoError as e:
+        # $indexStats needs clusterMonitor rights on some hosted clusters
+        logger.debug(f"Index stats unavailable for {col.name}: {e}")
+        return []
+
+    return [
+        f"{col.name}.{stat['name']}"
+        for stat in stats
+        if stat["name"] != "_id_" and not stat.get("accesses", {}).get("ops")
+    ]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: media_dedup.py
+Author: Maria Kevin
+Description: Maps Telegram file_unique_id to already saved copies of the file
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from database.core import Core
+
+
+class MediaDedupDB(Core):
+    """file_unique_id -> FILES_LOG message and Notion file upload of the same file"""
+
+    def __init__(self, uri, database_name):
+        super().__init__(uri, database_name, "media_dedup")
+
+    async def get(self, file_unique_id: str) -> Optional[dict]:
+        """Get the saved copies of a file, None if it was never saved"""
+        return await self.col.find_one({"file_unique_id": file_unique_id})
+
+    async def save_log(self, file_unique_id: str, log_chat_id: int, log_message_id: int):
+        """Remember the FILES_LOG message holding the file"""
+        return await self.col.update_one(
+            {"file_unique_id": file_unique_id},
+            {
+                "$set": {
+                    "log_chat_id": log_chat_id,
+                    "log_message_id": log_message_id,
+                    "updated_at": datetime.now(),
+                }
+            },
+            upsert=True,
+        )
+
+    async def save_notion_file(
+        self,
+        file_unique_id: str,
+        notion_file_id: str,
+        archive_files: Optional[dict] = None,
+    ):
+        """
+        Remember the Notion file upload (or archive uploads) of the file.
+
+        Call only once the upload is attached to an indexed page. Saving an
+        upload that is already stored keeps its original upload time, so a
+        reused upload still expires after the configured age.
+        """
+        update = {
+            "notion_file_id": notion_file_id,
+            "archive_files": archive_files,
+            "notion_uploaded_at": datetime.now(),
+        }
+        result = await self.col.update_one(
+            {"file_unique_id": file_unique_id, "notion_file_id": {"$ne": notion_file_id}},
+            {"$set": update},
+        )
+        if result.matched_count:
+            return result
+        return await self.col.update_one(
+            {"file_unique_id": file_unique_id},
+            {"$setOnInsert": update},
+            upsert=True,
+        )
+
+    def get_notion_file(self, doc: dict, max_age: int) -> Optional[str]:
+        """Notion file ID of a dedup entry, None if missing or older than max_age seconds"""
+        uploaded_at = doc.get("notion_uploaded_at")
+        if not doc.get("notion_file_id") or not uploaded_at:
+            return None
+        if datetime.now() - uploaded_at > timedelta(seconds=max_age):
+            return None
+        return doc["notion_file_id"]
+
+    async def forget_log(self, file_unique_id: str):
+        """Drop a FILES_LOG message that was deleted or can no longer be copied"""
+        return await self.col.update_one(
+            {"file_unique_id": file_unique_id},
+            {"$unset": {"log_chat_id": "", "log_message_id": ""}},
+        )
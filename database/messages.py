@@ -10,6 +10,8 @@ from datetime import datetime
 import logging
 from typing import TYPE_CHECKING, Optional
 
+from pymongo.errors import DuplicateKeyError
+
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
@@ -18,6 +20,12 @@ if TYPE_CHECKING:
 from database.core import Core
 
 
+def get_file_unique_id(message: "types.Message") -> Optional[str]:
+    """Telegram's id of the message's file, the same across chats and reposts"""
+    media = message.photo or message.video or message.audio or message.document
+    return getattr(media, "file_unique_id", None)
+
+
 class MessagesDB(Core):
     """Messages metadata storage"""
 
@@ -39,6 +47,7 @@ class MessagesDB(Core):
         indexed: bool = False,
         notion_page_id: Optional[str] = None,
         archive_files: Optional[dict] = None,
+        file_unique_id: Optional[str] = None,
     ):
         """Create a new message record"""
         doc = {
@@ -55,6 +64,7 @@ class MessagesDB(Core):
             "indexed": indexed,
             "notion_page_id": notion_page_id,
             "archive_files": archive_files,  # Store {file_ids: [...], file_names: [...], archive_name: "..."}
+            "file_unique_id": file_unique_id,  # Telegram file, for media_dedup once indexed
             "created_at": datetime.now(),
         }
         return await super().create(doc)
@@ -121,7 +131,8 @@ class MessagesDB(Core):
             caption=caption,
             media_title=media_title,
             media_url=file_id,
-            archive_files=archive_files
+            archive_files=archive_files,
+            file_unique_id=get_file_unique_id(message),
         )
 
     async def message_exists(self, message_id: int, chat_id: int) -> Optional[dict]:
@@ -217,6 +228,7 @@ class MessagesDB(Core):
                 "size": size,
                 "caption": caption,
                 "media_title": media_title,
+                "file_unique_id": get_file_unique_id(message),
             }
             
             if file_id:
@@ -233,12 +245,17 @@ class MessagesDB(Core):
             return existing["_id"], True
         
         # Message doesn't exist, create new
-        _id = await self.create_from_pyrogram(message, file_id, archive_files)
+        try:
+            _id = await self.create_from_pyrogram(message, file_id, archive_files)
+        except DuplicateKeyError:
+            # Saved by a concurrent transfer of the same message since the check, update that one
+            return await self.get_or_update_from_pyrogram(message, file_id, archive_files)
         return _id, True
 
-    async def get_unindexed(self):
-        """Get all messages not yet indexed to Notion"""
-        return await self.filter_documents({"indexed": False})
+    async def get_unindexed_ids(self) -> list:
+        """Get the IDs of all messages not yet indexed to Notion"""
+        cursor = self.col.find({"indexed": False}, {"_id": 1})
+        return [doc["_id"] async for doc in cursor]
 
     async def mark_indexed(self, _id: str, notion_page_id: str):
         """Mark message as indexed with Notion page ID"""
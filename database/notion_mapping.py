@@ -25,9 +25,8 @@ class NotionMappingDB(Core):
         topic_name: Optional[str] = None,
     ) -> Optional[str]:
         """Get existing Notion page ID or return None to create new"""
-        query = {"chat_id": chat_id}
-        if topic_id:
-            query["topic_id"] = topic_id
+        # Chat pages are saved without a topic_id, which matches None
+        query = {"chat_id": chat_id, "topic_id": topic_id or None}
         
         doc = await self.get_document(query)
         return doc["notion_page_id"] if doc else None
@@ -1,5 +1,5 @@
 from database.core import Core
-from bot.config import Script
+from bot.config import Config, Script
 
 
 class UserDatabase(Core):
@@ -17,6 +17,7 @@ class UserDatabase(Core):
         )
 
     async def remove_session(self, user_id):
+        Config.USER_CLIENTS.pop(user_id, None)
         return await super().update(
             user_id, {"session": {"string": None, "id": None, "username": None}}
         )